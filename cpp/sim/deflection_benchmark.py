@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark of the Jimenez wake deflection (WakeDeflection._jimenez) at the rotor grid size of the wind problem in
+generator.py and at the grid size of the VisualizationManager, compared to the per-x-slice loop it replaced.
+"""
+
+import argparse
+import copy
+import json
+import time
+
+import numpy as np
+
+from floris.coordinate import Coordinate
+from floris.turbine import Turbine
+from floris.wake_deflection import WakeDeflection
+
+
+def _jimenez_loop(deflection, x_locations):
+    # The grouped maximum as computed before: one pass over the grid for every unique x
+    deflection = deflection.copy()
+    x = np.unique(x_locations)
+    for i in range(len(x)):
+        tmp = np.max(deflection[..., x_locations == x[i]], axis=-1, keepdims=True)
+        deflection[..., x_locations == x[i]] = tmp
+    return deflection
+
+
+def _time(function, repeat):
+    # Best wall-clock time (s) of a call
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(repeat=5, wind_direction=np.radians(10.)):
+    """
+    Time the Jimenez deflection and the loop it replaced on the rotor grid (11 turbines of 4 x 4 points) and on the
+    100 x 100 x 25 visualization grid, rotated by wind_direction such that x takes many distinct values. Both must agree exactly.
+
+    Returns a list of (grid name, grid shape, seconds per deflection, seconds per loop deflection).
+    """
+    with open("configs/template_floris.json", "r") as f:
+        site = json.load(f)
+    with open("configs/specs_NREL_5MW.json", "r") as f:
+        spec = json.load(f)
+    model = WakeDeflection("jimenez", site["wake"]["properties"]["parameters"])
+    turbine = Turbine(copy.deepcopy(spec))
+    turbine.yaw_angle, turbine.Ct = np.radians(20.), 0.8
+    coord = Coordinate(0., 0.)
+
+    rng = np.random.RandomState(0)
+    grids = {
+        "rotor": rng.uniform(0., 2000., (11, 1, 1)) + rng.uniform(-60., 60., (11, 4, 4)) * np.sin(wind_direction),
+        "visualization": np.meshgrid(np.linspace(-630., 2630., 100), np.linspace(-500., 2000., 100),
+                                     np.linspace(0., 250., 25), indexing="ij"),
+    }
+    # Rotate the visualization grid such that the points of a plane no longer share their x
+    x, y, _ = grids["visualization"]
+    grids["visualization"] = x * np.cos(wind_direction) - y * np.sin(wind_direction)
+
+    results = []
+    for name, x_locations in grids.items():
+        y_locations = np.zeros(x_locations.shape)
+        deflection = model.function(x_locations, y_locations, turbine, coord, None)
+
+        # The deflection before the grouped maximum, to feed the loop
+        xi_init = 0.5 * np.cos(turbine.yaw_angle) * np.sin(turbine.yaw_angle) * turbine.Ct
+        x_offset = x_locations - coord.x
+        raw = (xi_init * (15 * (2 * model.kd * x_offset / turbine.rotor_diameter + 1)**4. + xi_init**2.)
+               / ((30 * model.kd / turbine.rotor_diameter) * (2 * model.kd * x_offset / turbine.rotor_diameter + 1)**5.)) \
+            - (xi_init * turbine.rotor_diameter * (15 + xi_init**2.) / (30 * model.kd)) + model.ad + model.bd * x_offset
+        start = time.perf_counter()
+        baseline = _jimenez_loop(raw, x_offset)
+        loop = time.perf_counter() - start  # a single call, as it takes seconds on the visualization grid
+        if not np.array_equal(deflection, baseline):
+            raise AssertionError("grouped maximum differs from the loop on the %s grid" % name)
+
+        grouped = _time(lambda: model.function(x_locations, y_locations, turbine, coord, None), repeat)
+        results.append((name, x_locations.shape, grouped, loop))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark of the Jimenez wake deflection")
+    parser.add_argument("--repeat", type=int, default=5, help="timed calls per grid (best is reported)")
+    args = parser.parse_args()
+
+    for name, shape, grouped, loop in benchmark(args.repeat):
+        print("%-13s %-14s grouped %10.3f ms   loop %10.3f ms   speedup %.0fx"
+              % (name, shape, grouped * 1e3, loop * 1e3, loop / grouped))
@@ -15,7 +15,7 @@ from .coordinate import Coordinate
 from .wake_combination import WakeCombination
 from .flow_field import FlowField
 from .turbine_map import TurbineMap
-import copy
+from .turbine import Turbine
 import numpy as np
 
 
@@ -54,11 +54,13 @@ class Farm(object):
 
         wake: Wake - Wake instance used in Farm
 
+        dtype: np.dtype - precision of the flow field (see FlowField)
+
     outputs:
         self: Farm - an instantiated Farm object
     """
 
-    def __init__(self, instance_dictionary, turbines, wake):
+    def __init__(self, instance_dictionary, turbines, wake, dtype=np.float64):
         self.description = instance_dictionary["description"]
         properties = instance_dictionary["properties"]
         _wake_combination = properties["wake_combination"]
@@ -70,6 +72,7 @@ class Farm(object):
         self.air_density = properties["air_density"]
         self.layout_x = properties["layout_x"]
         self.layout_y = properties["layout_y"]
+        self.dtype = dtype
 
         # these attributes need special attention
         self.wake_combination = WakeCombination(_wake_combination)
@@ -77,9 +80,68 @@ class Farm(object):
 
         turbine_dict = {}
         for c in list(zip(self.layout_x, self.layout_y, turbines)):
-            turbine_dict[Coordinate(c[0], c[1])] = copy.deepcopy(c[2])
+            turbine_dict[Coordinate(c[0], c[1])] = c[2].copy()
         self.turbine_map = TurbineMap(turbine_dict)
+        self.wake = wake
+
+        self._create_flow_field()
+        self.flow_field.calculate_wake()
+
+    @classmethod
+    def from_arrays(cls, layout_x, layout_y, turbine_spec, wake,
+                    wind_speed=8.0, wind_direction=270.0, turbulence_intensity=0.1,
+                    wind_shear=0.12, wind_veer=0.0, air_density=1.225,
+                    wake_combination="sosfs", description="Farm", dtype=np.float64):
+        """
+        Creates a Farm from arrays of turbine locations and a single turbine
+        specification, without building (and validating) input dictionaries
+
+        inputs:
+            layout_x: array_like - x coordinates of the turbines
 
+            layout_y: array_like - y coordinates of the turbines
+
+            turbine_spec: Turbine or dict - the turbine at every location, or its
+                input dictionary (as generated from the input_reader); the farm
+                copies it for every location, sharing its power_thrust_table,
+                Cp/Ct curves and swept area grid
+
+            wake: Wake - Wake instance used in Farm
+
+            wind_speed, wind_direction, turbulence_intensity, wind_shear,
+            wind_veer, air_density, wake_combination, dtype: see Farm
+
+        outputs:
+            self: Farm - an instantiated Farm object
+        """
+        if not isinstance(turbine_spec, Turbine):
+            turbine_spec = Turbine(turbine_spec)
+        layout_x = [float(x) for x in layout_x]
+        layout_y = [float(y) for y in layout_y]
+        if len(layout_x) != len(layout_y):
+            raise ValueError("layout_x and layout_y must have the same length")
+
+        instance_dictionary = {
+            "description": description,
+            "properties": {
+                "wind_speed": wind_speed,
+                "wind_direction": wind_direction,
+                "turbulence_intensity": turbulence_intensity,
+                "wind_shear": wind_shear,
+                "wind_veer": wind_veer,
+                "air_density": air_density,
+                "wake_combination": wake_combination,
+                "layout_x": layout_x,
+                "layout_y": layout_y
+            }
+        }
+        return cls(instance_dictionary, [turbine_spec] * len(layout_x), wake, dtype)
+
+    def _create_flow_field(self):
+        """
+        Creates the flow field from the current flow properties; the turbines
+        (and their cached rotor grids) are reused
+        """
         self.flow_field = FlowField(wake_combination=self.wake_combination,
                                     wind_speed=self.wind_speed,
                                     wind_direction=self.wind_direction,
@@ -88,8 +150,8 @@ class Farm(object):
                                     turbulence_intensity=self.turbulence_intensity,
                                     air_density=self.air_density,
                                     turbine_map=self.turbine_map,
-                                    wake=wake)
-        self.flow_field.calculate_wake()
+                                    wake=self.wake,
+                                    dtype=self.dtype)
 
     def _set_flow_property(self, property_name, value, calculate_wake=True):
         """
@@ -10,6 +10,7 @@
 # specific language governing permissions and limitations under the License.
 
 from .input_reader import InputReader
+import numpy as np
 
 class Floris():
     """
@@ -20,14 +21,17 @@ class Floris():
     inputs:
         input_file: str - path to the json input file
         input_dict: dict - dictionary of appropriate inputs
+        dtype: np.dtype - precision of the flow field computations, e.g.
+            np.float32 for large visualization grids and batched yaw sweeps
 
     outputs:
         self: Floris - an instantiated Floris object
     """
 
-    def __init__(self, input_file=None, input_dict=None):
+    def __init__(self, input_file=None, input_dict=None, dtype=np.float64):
         self.input_reader = InputReader()
         self.input_file = input_file
         self.input_dict = input_dict
         self.farm = self.input_reader.read(input_file=self.input_file,
-                                           input_dict=self.input_dict)
+                                           input_dict=self.input_dict,
+                                           dtype=dtype)
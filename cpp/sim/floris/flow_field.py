@@ -9,9 +9,9 @@
 # CONDITIONS OF ANY KIND, either express or implied. See the License for the
 # specific language governing permissions and limitations under the License.
 
+import concurrent.futures
 import numpy as np
 from .coordinate import Coordinate
-from scipy.interpolate import griddata
 
 class FlowField():
     """
@@ -37,6 +37,9 @@ class FlowField():
         
         turbine_map: TurbineMap - locates turbines in space
 
+        dtype: np.dtype - precision of the grids, the flow field and the wake
+            model computations (e.g., np.float32 to halve their memory)
+
     outputs:
         self: FlowField - an instantiated FlowField object
     """
@@ -50,7 +53,8 @@ class FlowField():
                  air_density,
                  wake,
                  wake_combination,
-                 turbine_map):
+                 turbine_map,
+                 dtype=np.float64):
 
         self.wind_speed = wind_speed
         self.wind_direction = wind_direction
@@ -61,6 +65,23 @@ class FlowField():
         self.wake = wake
         self.wake_combination = wake_combination
         self.turbine_map = turbine_map
+        self.dtype = np.dtype(dtype)
+
+        # wake cone outside of which the deficit of a turbine is neglected:
+        # a lateral band of wake_margin rotor diameters, widened by
+        # wake_spread times the downstream distance (see TurbineMap.wake_influence)
+        self.wake_margin = 2.0
+        self.wake_spread = 0.5
+
+        # wakes of the previous calculation, reused for the turbines whose
+        # inputs did not change (see calculate_wake)
+        self._wake_cache = {}
+        self._wake_cache_context = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # scratch arrays of the wake models (see work_buffer)
+        self._work_buffers = {}
         
         # initialize derived attributes and constants
         self.max_diameter = max(
@@ -74,35 +95,12 @@ class FlowField():
         """
         Create grid points at each turbine
         """
-        xt = [coord.x for coord in self.turbine_map.coords]
         rotor_points = int(np.sqrt(self.turbine_map.turbines[0].grid_point_count))
-        x_grid = np.zeros((len(xt), rotor_points, rotor_points))
-        y_grid = np.zeros((len(xt), rotor_points, rotor_points))
-        z_grid = np.zeros((len(xt), rotor_points, rotor_points))
-
-        for i, (coord, turbine) in enumerate(self.turbine_map.items()):
-            yt = np.linspace(coord.y - turbine.rotor_radius,
-                             coord.y + turbine.rotor_radius,
-                             rotor_points)
-            zt = np.linspace(turbine.hub_height - turbine.rotor_radius,
-                             turbine.hub_height + turbine.rotor_radius,
-                             rotor_points)
-
-            for j in range(len(yt)):
-                for k in range(len(zt)):
-                    x_grid[i,j,k] = xt[i]
-                    y_grid[i,j,k] = yt[j]
-                    z_grid[i,j,k] = zt[k]
-
-                    xoffset = x_grid[i,j,k] - coord.x
-                    yoffset = y_grid[i,j,k] - coord.y
-                    x_grid[i,j,k] = xoffset * np.cos(-self.wind_direction) - yoffset * np.sin(-self.wind_direction) + coord.x
-                    y_grid[i,j,k] = yoffset * np.cos(-self.wind_direction) + xoffset * np.sin(-self.wind_direction) + coord.y
-        
-        return x_grid, y_grid, z_grid
+        grid = self.turbine_map.rotor_grid(self.wind_direction, rotor_points)
+        return tuple(component.astype(self.dtype, copy=False) for component in grid)
     
     def _initial_flowfield(self):
-        return self.wind_speed * (self.z / self.hub_height)**self.wind_shear
+        return (self.wind_speed * (self.z / self.hub_height)**self.wind_shear).astype(self.dtype, copy=False)
 
     def _compute_turbine_velocity_deficit(self, x, y, z, turbine, coord, deflection, wake, flowfield):
         velocity_function = self.wake.get_velocity_function()
@@ -112,26 +110,129 @@ class FlowField():
         deflection_function = self.wake.get_deflection_function()
         return deflection_function(x, y, turbine, coord, flowfield)
 
-    def _rotated_grid(self, angle, center_of_rotation):
-        xoffset = self.x - center_of_rotation.x
-        yoffset = self.y - center_of_rotation.y
+    def _rotated_grid(self, angle, center_of_rotation, x=None, y=None, z=None):
+        # rotates the grid, or the given points
+        x, y, z = (self.x, self.y, self.z) if x is None else (x, y, z)
+        xoffset = x - center_of_rotation.x
+        yoffset = y - center_of_rotation.y
         rotated_x = xoffset * \
             np.cos(angle) - yoffset * \
             np.sin(angle) + center_of_rotation.x
         rotated_y = xoffset * \
             np.sin(angle) + yoffset * \
             np.cos(angle) + center_of_rotation.y
-        return rotated_x, rotated_y, self.z
+        return rotated_x, rotated_y, z
 
     def _calculate_area_overlap(self, wake_velocities, freestream_velocities, turbine):
         # compute wake overlap based on the number of points that are not freestream velocity, i.e. affected by the wake
-        count = np.sum(freestream_velocities - wake_velocities <= 0.05)
-        return (turbine.grid_point_count - count) / turbine.grid_point_count
+        count = np.sum(freestream_velocities - wake_velocities <= 0.05, axis=-1)
+        overlap = (turbine.grid_point_count - count) / turbine.grid_point_count
+        # for a batch, the overlaps broadcast against the turbine quantities
+        return overlap if np.ndim(overlap) == 0 else overlap.reshape(-1, 1, 1, 1)
+
+    def _calculate_wake_overlaps(self, coord, turbine, waked_map, turb_wake, rotated_x, rotated_y, rotated_z):
+        # compute the area overlap of the wake of turbine on the turbines downstream of it
+        overlaps = []
+        for coord_ti, turbine_ti in waked_map:
+
+            if coord_ti.x > coord.x and np.abs(coord.y - coord_ti.y) < 2*turbine.rotor_diameter:
+                # only assess the effects of the current wake
+                wake_velocities = turbine_ti._calculate_swept_area_velocities(
+                    self.wind_direction,
+                    self.initial_flowfield - turb_wake,
+                    coord_ti,
+                    rotated_x,
+                    rotated_y,
+                    rotated_z)
+                freestream_velocities = turbine_ti._calculate_swept_area_velocities(
+                    self.wind_direction,
+                    self.initial_flowfield,
+                    coord_ti,
+                    rotated_x,
+                    rotated_y,
+                    rotated_z)
+
+                area_overlap = self._calculate_area_overlap(wake_velocities, freestream_velocities, turbine)
+                if np.any(area_overlap > 0.0):
+                    overlaps.append((coord_ti, turbine_ti, area_overlap))
+        return overlaps
 
     # Public methods
 
-    def calculate_wake(self):
+    def work_buffer(self, name, shape, dtype=None):
+        """
+        Returns a preallocated scratch array for the wake models, reused by
+        every call with the same name, shape and dtype. Its content is
+        undefined, and it must not be returned or stored by the caller.
+
+        inputs:
+            name: str - the purpose of the array
+
+            shape: tuple - the shape of the array
+
+            dtype: type - the data type of the array (the precision of
+                the flow field by default)
+
+        outputs:
+            buffer: np.ndarray - the scratch array
+        """
+        dtype = self.dtype if dtype is None else np.dtype(dtype)
+        key = (name, shape, dtype)
+        if key not in self._work_buffers:
+            self._work_buffers[key] = np.empty(shape, dtype)
+        return self._work_buffers[key]
+
+    def clear_wake_cache(self):
+        """
+        Forgets the turbine wakes of the previous calculations. The cache is
+        cleared automatically when an atmospheric condition or the wake cone
+        changes; call this after modifying the wake models in place.
+        """
+        self._wake_cache = {}
 
+    def calculate_wake(self, yaw_angles=None):
+        """
+        Calculates the wake of every turbine and combines them into the flow field.
+
+        The wake of a turbine (its deficit and its overlap with the turbines
+        downstream) is cached together with its inputs: yaw angle, Ct,
+        turbulence intensity and inflow velocities. When only some yaw angles
+        change, only the changed turbines and the turbines in their wakes
+        are recomputed. cache_hits and cache_misses count the reused and
+        recomputed wakes. The cache only holds for this flow field at fixed
+        atmospheric conditions: Farm.set_wind_speed and its siblings build a
+        new FlowField, with an empty cache.
+
+        inputs:
+            yaw_angles: np.ndarray - optional batch of yaw configurations in
+                degrees, one row per configuration and one column per turbine
+                (in the order of the turbine map). The whole batch is evaluated
+                in a single pass: the turbine quantities (power, Ct, ...) and
+                the flow field get a leading batch axis. The yaw angles of the
+                turbines are restored afterwards.
+
+        outputs:
+            powers: np.ndarray - the power of every turbine (columns) for every
+                yaw configuration (rows), if yaw_angles is given
+        """
+        if yaw_angles is None:
+            self._calculate_wake()
+            return
+
+        # the yaw angles of the batch only hold during the calculation, such
+        # that a later unbatched calculation uses those set on the turbines
+        yaw_angles = np.radians(np.asarray(yaw_angles, dtype=float))
+        set_yaw_angles = [turbine.yaw_angle for turbine in self.turbine_map.turbines]
+        try:
+            for turbine, yaw_angle in zip(self.turbine_map.turbines, yaw_angles.T):
+                turbine.yaw_angle = yaw_angle.reshape(-1, 1, 1, 1)
+            self._calculate_wake(len(yaw_angles))
+        finally:
+            for turbine, yaw_angle in zip(self.turbine_map.turbines, set_yaw_angles):
+                turbine.yaw_angle = yaw_angle
+        return np.column_stack([np.ravel(turbine.power) for turbine in self.turbine_map.turbines])
+
+    def _calculate_wake(self, batch_size=None):
         # initialize turbulence intensity at every turbine (seems sloppy)
         for coord, turbine in self.turbine_map.items():
             turbine.turbulence_intensity = self.turbulence_intensity
@@ -151,68 +252,190 @@ class FlowField():
         # sort the turbine map
         sorted_map = rotated_map.sorted_in_x_as_list()
 
+        # the deficit of a turbine is only calculated on the grids of the
+        # turbines inside its wake cone
+        context = (self.wind_speed, self.wind_direction, self.wind_shear, self.wind_veer,
+                   self.turbulence_intensity, self.air_density, self.wake_margin, self.wake_spread,
+                   self.wake, self.wake_combination)
+        if context != self._wake_cache_context:
+            self.clear_wake_cache()
+            self._wake_cache_context = context
+        rows = {id(turbine): row for row, turbine in enumerate(self.turbine_map.turbines)}
+        influence = self.turbine_map.wake_influence(
+            self.wind_direction, self.wake_margin, self.wake_spread)
+
         # calculate the velocity deficit and wake deflection on the mesh
-        u_wake = np.zeros(self.u_field.shape)
+        u_wake = np.zeros(self.initial_flowfield.shape, self.dtype)
+        if batch_size is not None:
+            u_wake = np.zeros((batch_size,) + u_wake.shape, self.dtype)
         for coord, turbine in sorted_map:
 
             # update the turbine based on the velocity at its hub
             turbine.update_quantities(u_wake, coord, self, rotated_x, rotated_y, rotated_z)
-            
-            # get the wake deflecton field
-            deflection = self._compute_turbine_wake_deflection(rotated_x, rotated_y, turbine, coord, self)
 
-            # get the velocity deficit accounting for the deflection
-            turb_wake = self._compute_turbine_velocity_deficit(
-                rotated_x, rotated_y, rotated_z, turbine, coord, deflection, self.wake, self)
-
-            if self.wake.velocity_model.type_string == 'gauss':
-
-                # compute area overlap of wake on other turbines and update downstream turbine turbulence intensities
-                for coord_ti, turbine_ti in sorted_map:
-
-                    if coord_ti.x > coord.x and np.abs(coord.y - coord_ti.y) < 2*turbine.rotor_diameter:
-                        # only assess the effects of the current wake
-
-                        if turbine_ti.plotting:
-                            wake_velocities = turbine_ti._calculate_swept_area_velocities_visualization(
-                                self.grid_resolution,
-                                self.initial_flowfield - turb_wake,
-                                coord_ti,
-                                rotated_x,
-                                rotated_y,
-                                rotated_z)
-                            freestream_velocities = turbine_ti._calculate_swept_area_velocities_visualization(
-                                self.grid_resolution,
-                                self.initial_flowfield,
-                                coord_ti,
-                                rotated_x,
-                                rotated_y,
-                                rotated_z)
-
-                        else:
-                            wake_velocities = turbine_ti._calculate_swept_area_velocities(
-                                self.wind_direction,
-                                self.initial_flowfield - turb_wake,
-                                coord_ti,
-                                rotated_x,
-                                rotated_y,
-                                rotated_z)
-                            freestream_velocities = turbine_ti._calculate_swept_area_velocities(
-                                self.wind_direction,
-                                self.initial_flowfield,
-                                coord_ti,
-                                rotated_x,
-                                rotated_y,
-                                rotated_z)
-
-                        area_overlap = self._calculate_area_overlap(wake_velocities, freestream_velocities, turbine)
-                        if area_overlap > 0.0:
-                            turbine_ti.turbulence_intensity = turbine_ti.calculate_turbulence_intensity(
-                                                self.turbulence_intensity,
-                                                self.wake.velocity_model, coord_ti, coord, turbine)
+            # the wake of a turbine only depends on its inputs, so it is reused
+            # from the previous calculation if none of them changed
+            inputs = (turbine.yaw_angle, turbine.Ct, turbine.turbulence_intensity, turbine.velocities)
+            cached = self._wake_cache.get(id(turbine))
+            if cached is not None and all(np.array_equal(a, b) for a, b in zip(cached[0], inputs)):
+                self.cache_hits += 1
+                wake_rows, deficit, overlaps = cached[1:]
+            else:
+                self.cache_misses += 1
+                wake_rows = influence[rows[id(turbine)]]
+                flowfield = _FlowFieldView(self, self.initial_flowfield[wake_rows])
+                x, y, z = rotated_x[wake_rows], rotated_y[wake_rows], rotated_z[wake_rows]
+                waked_map = [(rotated_map.coords[row], rotated_map.turbines[row]) for row in wake_rows]
+
+                # get the wake deflecton field
+                deflection = self._compute_turbine_wake_deflection(x, y, turbine, coord, flowfield)
+
+                # get the velocity deficit accounting for the deflection
+                deficit = self._compute_turbine_velocity_deficit(
+                    x, y, z, turbine, coord, deflection, self.wake, flowfield)
+
+                overlaps = []
+                if self.wake.velocity_model.type_string == 'gauss':
+                    turb_wake = np.zeros(u_wake.shape, self.dtype)
+                    turb_wake[..., wake_rows, :, :] = deficit
+                    overlaps = self._calculate_wake_overlaps(
+                        coord, turbine, waked_map, turb_wake, rotated_x, rotated_y, rotated_z)
+
+                self._wake_cache[id(turbine)] = (inputs, wake_rows, deficit, overlaps)
+
+            # update the turbulence intensities of the downstream turbines that the wake overlaps
+            for coord_ti, turbine_ti, area_overlap in overlaps:
+                turbulence_intensity = turbine_ti.calculate_turbulence_intensity(
+                                    self.turbulence_intensity,
+                                    self.wake.velocity_model, coord_ti, coord, turbine)
+                if np.all(area_overlap > 0.0):
+                    turbine_ti.turbulence_intensity = turbulence_intensity
+                else:
+                    # only update the configurations of a batch whose wake overlaps
+                    turbine_ti.turbulence_intensity = np.where(area_overlap > 0.0,
+                                                               turbulence_intensity,
+                                                               turbine_ti.turbulence_intensity)
 
             # combine this turbine's wake into the full wake field
-            u_wake = self.wake_combination.combine(u_wake, turb_wake)
+            u_wake[..., wake_rows, :, :] = self.wake_combination.combine(
+                u_wake[..., wake_rows, :, :], deficit)
 
         # apply the velocity deficit field to the freestream
         self.u_field = self.initial_flowfield - u_wake
+
+    def calculate_flow_on_grid(self, x, y, z, tile_points=2**18, max_workers=None):
+        """
+        Calculates the flow speed on a grid given the turbine quantities of the
+        last calculate_wake on the rotor grids. The wake models are local in x
+        for given turbine quantities, so the grid is processed in tiles of
+        slices along its first axis (x for a grid from np.meshgrid with
+        indexing='ij'), which bounds the memory of the wake calculation.
+
+        inputs:
+            x, y, z: np.ndarray - the components of the grid points, in the
+                frame of reference of the turbine map
+
+            tile_points: int - maximum number of grid points per tile (a
+                tile holds at least one slice)
+
+            max_workers: int - number of processes evaluating the tiles, or
+                None to evaluate them in this process
+
+        outputs:
+            u_field: np.ndarray - the flow speed at every grid point
+        """
+        x, y, z = (np.asarray(component, self.dtype) for component in (x, y, z))
+        tile_size = max(1, tile_points // max(1, x[0].size))
+        tiles = [slice(start, start + tile_size) for start in range(0, len(x), tile_size)]
+        points = [(x[tile], y[tile], z[tile]) for tile in tiles]
+
+        if max_workers is None:
+            u_tiles = (self._calculate_flow(*tile) for tile in points)
+            return self._assemble_tiles(tiles, u_tiles, x.shape)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, initializer=_set_tile_flowfield,
+                                                    initargs=(self,)) as executor:
+            u_tiles = executor.map(_calculate_tile_flow, *zip(*points))
+            return self._assemble_tiles(tiles, u_tiles, x.shape)
+
+    def sample(self, x, y, z, tile_points=2**18, max_workers=None):
+        """
+        Calculates the flow speed at arbitrary sample points (a plane, a line,
+        a point cloud) given the turbine quantities of the last calculate_wake
+        on the rotor grids. The cost is that of the sample points times the
+        turbines, independent of any visualization grid.
+
+        inputs:
+            x, y, z: np.ndarray or float - the components of the sample
+                points, in the frame of reference of the turbine map; they
+                are broadcast against each other (e.g., a scalar z samples a
+                horizontal plane)
+
+            tile_points: int - maximum number of sample points per tile
+
+            max_workers: int - number of processes evaluating the tiles, or
+                None to evaluate them in this process
+
+        outputs:
+            u: np.ndarray - the flow speed at every sample point, with the
+                broadcast shape of x, y and z
+        """
+        x, y, z = np.broadcast_arrays(*(np.asarray(component, self.dtype) for component in (x, y, z)))
+        shape = x.shape
+        u = self.calculate_flow_on_grid(x.ravel(), y.ravel(), z.ravel(), tile_points, max_workers)
+        return u.reshape(u.shape[:-1] + shape)
+
+    def _assemble_tiles(self, tiles, u_tiles, shape):
+        # the flow speeds of the tiles of a grid, in one array (batched turbine quantities give a leading batch axis)
+        # (the turbine quantities have shape (B, 1, 1, 1), so the batch axis is followed by unit axes on grids of
+        # fewer than 3 dimensions)
+        u_field = None
+        for tile, u_tile in zip(tiles, u_tiles):
+            batch = u_tile.shape[:max(0, u_tile.ndim - len(shape))][:1]
+            u_tile = u_tile.reshape(batch + u_tile.shape[u_tile.ndim - len(shape):])
+            if u_field is None:
+                u_field = np.empty(batch + shape, self.dtype)
+            u_field[(Ellipsis, tile) + (slice(None),) * (len(shape) - 1)] = u_tile
+        return u_field
+
+    def _calculate_flow(self, x, y, z):
+        # flow speed at the points (x, y, z), superposing the wakes of the turbines in their current state
+        rotated_x, rotated_y, rotated_z = self._rotated_grid(self.wind_direction, Coordinate(0, 0), x, y, z)
+        sorted_map = self.turbine_map.rotated(self.wind_direction, Coordinate(0, 0)).sorted_in_x_as_list()
+        initial_flowfield = (self.wind_speed * (z / self.hub_height)**self.wind_shear).astype(self.dtype, copy=False)
+        flowfield = _FlowFieldView(self, initial_flowfield)
+
+        u_wake = np.zeros(initial_flowfield.shape, self.dtype)
+        for coord, turbine in sorted_map:
+            deflection = self._compute_turbine_wake_deflection(rotated_x, rotated_y, turbine, coord, flowfield)
+            turb_wake = self._compute_turbine_velocity_deficit(
+                rotated_x, rotated_y, rotated_z, turbine, coord, deflection, self.wake, flowfield)
+            u_wake = self.wake_combination.combine(u_wake, turb_wake)
+        return initial_flowfield - u_wake
+
+
+class _FlowFieldView():
+    """
+    The FlowField as seen by the wake models when a deficit is calculated on
+    other points than its grid: the rotor grids of some of the turbines, or
+    a tile of a visualization grid.
+    """
+
+    def __init__(self, flowfield, initial_flowfield):
+        self._flowfield = flowfield
+        self.initial_flowfield = initial_flowfield
+
+    def __getattr__(self, name):
+        return getattr(self._flowfield, name)
+
+
+# the FlowField of the tiles evaluated by a worker process of calculate_flow_on_grid
+_tile_flowfield = None
+
+
+def _set_tile_flowfield(flowfield):
+    global _tile_flowfield
+    _tile_flowfield = flowfield
+
+
+def _calculate_tile_flow(x, y, z):
+    return _tile_flowfield._calculate_flow(x, y, z)
@@ -13,6 +13,7 @@ from .turbine import Turbine
 from .wake import Wake
 from .farm import Farm
 import json
+import numpy as np
 
 class InputReader():
     """
@@ -169,10 +170,16 @@ class InputReader():
         outputs:
             turbine: Turbine - instantiated Turbine object
         """
+        # identical turbine dictionaries are validated and instantiated once;
+        # the farm copies the shared Turbine for each of their locations
         turbines = []
+        built = []
         for turbine_dict in json_dict:
-            propertyDict = self._validateJSON(turbine_dict, self._turbine_properties)
-            turbine = Turbine(propertyDict)
+            turbine = next((turbine for spec, turbine in built if spec == turbine_dict), None)
+            if turbine is None:
+                propertyDict = self._validateJSON(turbine_dict, self._turbine_properties)
+                turbine = Turbine(propertyDict)
+                built.append((turbine_dict, turbine))
             turbines.append(turbine)
         return turbines
 
@@ -189,7 +196,7 @@ class InputReader():
         propertyDict = self._validateJSON(json_dict, self._wake_properties)
         return Wake(propertyDict)
 
-    def _build_farm(self, json_dict, turbines, wake):
+    def _build_farm(self, json_dict, turbines, wake, dtype):
         """
         Instantiates a Farm object from a given input file
 
@@ -200,19 +207,25 @@ class InputReader():
 
             wake: Wake - Wake instance used in Farm
 
+            dtype: np.dtype - precision of the flow field
+
         outputs:
             farm: Farm - instantiated Farm object
         """
         propertyDict = self._validateJSON(json_dict, self._farm_properties)
-        return Farm(propertyDict, turbines, wake)
+        return Farm(propertyDict, turbines, wake, dtype)
 
-    def read(self, input_file=None, input_dict=None):
+    def read(self, input_file=None, input_dict=None, dtype=np.float64):
         """
         Parses main input file
 
         inputs:
             input_file: str - path to the json input file
 
+            input_dict: dict - dictionary of appropriate inputs
+
+            dtype: np.dtype - precision of the flow field (see FlowField)
+
         outputs:
             farm: instantiated FLORIS model of wind farm
         """
@@ -225,5 +238,5 @@ class InputReader():
 
         turbines = self._build_turbine(json_dict["turbines"])
         wake = self._build_wake(json_dict["wake"])
-        farm = self._build_farm(json_dict["farm"], turbines, wake)
+        farm = self._build_farm(json_dict["farm"], turbines, wake, dtype)
         return farm
@@ -0,0 +1,118 @@
+"""
+Copyright 2017 NREL
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import numpy as np
+import copy
+from floris.farm import Farm
+from floris.turbine import Turbine
+from floris.wake import Wake
+from .sample_inputs import SampleInputs
+
+
+class FarmTest():
+    def __init__(self):
+        self.sample_inputs = SampleInputs()
+        # place the second turbine in the wake of the first
+        self.sample_inputs.farm["properties"]["layout_x"] = [0.0, 630.0]
+        self.sample_inputs.farm["properties"]["layout_y"] = [0.0, 0.0]
+        self.instance = self._build_instance()
+
+    def _build_instance(self, yaw_angle=0.0, wind_speed=8.0):
+        farm = copy.deepcopy(self.sample_inputs.farm)
+        farm["properties"]["wind_speed"] = wind_speed
+        turbine = copy.deepcopy(self.sample_inputs.turbine)
+        turbine["properties"]["yaw_angle"] = yaw_angle
+        return Farm(farm, [Turbine(turbine)] * 2, Wake(self.sample_inputs.wake))
+
+
+def test_instantiation():
+    """
+    The class should initialize with the standard inputs
+    """
+    test_class = FarmTest()
+    assert test_class.instance is not None
+
+
+def test_set_yaw_angles():
+    """
+    The class should update the yaw angles of an existing farm in place; the
+    resulting powers should equal those of a farm built with these yaw angles
+    """
+    test_class = FarmTest()
+    test_class.instance.set_yaw_angles(20.0)
+    baseline = test_class._build_instance(yaw_angle=20.0)
+    powers = [turbine.power for turbine in test_class.instance.turbines]
+    baseline_powers = [turbine.power for turbine in baseline.turbines]
+    assert np.allclose(powers, baseline_powers, rtol=0.0, atol=0.0)
+
+
+def test_set_wind_speed():
+    """
+    The class should recreate the flow field of an existing farm for a new
+    wind speed; the resulting powers should equal those of a farm built with
+    this wind speed
+    """
+    test_class = FarmTest()
+    test_class.instance.set_wind_speed(9.0)
+    baseline = test_class._build_instance(wind_speed=9.0)
+    powers = [turbine.power for turbine in test_class.instance.turbines]
+    baseline_powers = [turbine.power for turbine in baseline.turbines]
+    assert np.allclose(powers, baseline_powers, rtol=0.0, atol=0.0)
+
+
+def test_calculate_wake_after_batch():
+    """
+    The class should restore the yaw angles of the turbines after a batched
+    wake calculation; later unbatched calculations and a new wind speed
+    should give the powers of a farm that never ran the batch
+    """
+    test_class = FarmTest()
+    farm = test_class.instance
+    powers = farm.flow_field.calculate_wake(np.array([[0.0, 0.0], [20.0, 0.0]]))
+    assert powers.shape == (2, 2)
+    assert [turbine.yaw_angle for turbine in farm.turbines] == [0.0, 0.0]
+
+    farm.flow_field.calculate_wake()
+    baseline = test_class._build_instance()
+    assert np.allclose([turbine.power for turbine in farm.turbines],
+                       [turbine.power for turbine in baseline.turbines], rtol=0.0, atol=0.0)
+
+    farm.set_wind_speed(9.0)
+    baseline = test_class._build_instance(wind_speed=9.0)
+    assert np.allclose([turbine.power for turbine in farm.turbines],
+                       [turbine.power for turbine in baseline.turbines], rtol=0.0, atol=0.0)
+
+
+def test_from_arrays():
+    """
+    The class should build a farm from arrays of turbine locations and a
+    single turbine; the resulting powers should equal those of a farm built
+    from input dictionaries, and the turbines should share their curves
+    """
+    test_class = FarmTest()
+    properties = test_class.sample_inputs.farm["properties"]
+    farm = Farm.from_arrays(np.array(properties["layout_x"]),
+                            np.array(properties["layout_y"]),
+                            copy.deepcopy(test_class.sample_inputs.turbine),
+                            Wake(test_class.sample_inputs.wake),
+                            **{name: properties[name] for name in (
+                                "wind_speed", "wind_direction", "turbulence_intensity",
+                                "wind_shear", "wind_veer", "air_density", "wake_combination")})
+    powers = [turbine.power for turbine in farm.turbines]
+    baseline_powers = [turbine.power for turbine in test_class.instance.turbines]
+    assert np.allclose(powers, baseline_powers, rtol=0.0, atol=0.0)
+
+    first, second = farm.turbines
+    assert first is not second
+    assert first.power_thrust_table is second.power_thrust_table
+    assert first.fCp.__self__ is second.fCp.__self__
@@ -48,7 +48,7 @@ class FlowFieldTest():
             "turbine_map": turbine_map
         }
 
-    def _build_instance(self):
+    def _build_instance(self, dtype=np.float64):
         return FlowField(self.input_dict["wind_speed"],
                          self.input_dict["wind_direction"],
                          self.input_dict["wind_shear"],
@@ -57,7 +57,8 @@ class FlowFieldTest():
                          self.input_dict["air_density"],
                          self.input_dict["wake"],
                          self.input_dict["wake_combination"],
-                         self.input_dict["turbine_map"])
+                         self.input_dict["turbine_map"],
+                         dtype)
 
 
 def test_instantiation():
@@ -78,3 +79,123 @@ def test_discretize_domain():
     assert np.shape(x) == (2, 4, 4) and type(x) is np.ndarray \
         and np.shape(y) == (2, 4, 4) and type(y) is np.ndarray \
         and np.shape(z) == (2, 4, 4) and type(z) is np.ndarray
+
+
+def test_calculate_wake_batch():
+    """
+    The class should evaluate a batch of yaw configurations in a single
+    wake calculation; every row of the resulting power matrix should equal
+    the powers of the corresponding configuration calculated on its own
+    """
+    test_class = FlowFieldTest()
+    flow_field = test_class.instance
+    yaw_angles = np.array([[0.0, 0.0], [20.0, 0.0], [-10.0, 25.0]])
+    powers = flow_field.calculate_wake(yaw_angles)
+    assert np.shape(powers) == (3, 2)
+
+    for yaw_angle, batch_powers in zip(yaw_angles, powers):
+        for angle, turbine in zip(yaw_angle, flow_field.turbine_map.turbines):
+            turbine.set_yaw_angle(angle)
+        flow_field.calculate_wake()
+        baseline = [turbine.power for turbine in flow_field.turbine_map.turbines]
+        assert np.allclose(batch_powers, baseline)
+
+
+def test_calculate_wake_sparse():
+    """
+    The class should only calculate a wake deficit on the turbines inside
+    the wake cone of the turbine; the turbine powers should equal those
+    of a wake cone that includes every turbine
+    """
+    test_class = FlowFieldTest()
+    turbine = Turbine(test_class.sample_inputs.turbine)
+    test_class.input_dict["turbine_map"] = TurbineMap({
+        Coordinate(0.0, 0.0): copy.deepcopy(turbine),
+        Coordinate(630.0, 0.0): copy.deepcopy(turbine),
+        Coordinate(0.0, 1000.0): copy.deepcopy(turbine)
+    })
+    flow_field = test_class._build_instance()
+    influence = flow_field.turbine_map.wake_influence(
+        flow_field.wind_direction, flow_field.wake_margin, flow_field.wake_spread)
+    assert [list(rows) for rows in influence] == [[0, 1], [1], [2]]
+
+    flow_field.calculate_wake()
+    sparse = [turbine.power for turbine in flow_field.turbine_map.turbines]
+    flow_field.wake_margin = np.inf
+    flow_field.calculate_wake()
+    dense = [turbine.power for turbine in flow_field.turbine_map.turbines]
+    assert np.allclose(sparse, dense)
+
+
+def test_calculate_wake_cache():
+    """
+    The class should reuse the wakes of the turbines whose inputs did not
+    change since the previous calculation; the turbine powers should equal
+    those of a calculation from scratch
+    """
+    test_class = FlowFieldTest()
+    flow_field = test_class.instance
+    upstream, downstream = flow_field.turbine_map.turbines
+    flow_field.calculate_wake()
+    assert flow_field.cache_hits == 0 and flow_field.cache_misses == 2
+
+    downstream.set_yaw_angle(20.0)
+    flow_field.calculate_wake()
+    assert flow_field.cache_hits == 1 and flow_field.cache_misses == 3
+    cached = [turbine.power for turbine in flow_field.turbine_map.turbines]
+
+    flow_field.clear_wake_cache()
+    flow_field.calculate_wake()
+    assert flow_field.cache_misses == 5
+    assert cached == [turbine.power for turbine in flow_field.turbine_map.turbines]
+
+
+def test_calculate_wake_float32():
+    """
+    The class should compute the grids and the flow field in the given
+    precision; the turbine powers in float32 should be close to those in
+    float64
+    """
+    test_class = FlowFieldTest()
+    powers = []
+    for dtype in (np.float64, np.float32):
+        flow_field = test_class._build_instance(dtype)
+        flow_field.calculate_wake()
+        assert flow_field.x.dtype == dtype and flow_field.u_field.dtype == dtype
+        powers.append([turbine.power for turbine in flow_field.turbine_map.turbines])
+    assert np.allclose(powers[1], powers[0], rtol=1e-5, atol=0.0)
+
+
+def test_calculate_flow_on_grid():
+    """
+    The class should calculate the flow on a grid from the turbine quantities
+    of the last wake calculation; on the rotor grids, it should equal the
+    flow field, whatever the number of points per tile
+    """
+    test_class = FlowFieldTest()
+    flow_field = test_class.instance
+    flow_field.wake_margin = np.inf
+    flow_field.calculate_wake()
+    u_field = flow_field.calculate_flow_on_grid(flow_field.x, flow_field.y, flow_field.z)
+    assert np.allclose(u_field, flow_field.u_field)
+    tiled = flow_field.calculate_flow_on_grid(flow_field.x, flow_field.y, flow_field.z, tile_points=16)
+    assert np.array_equal(tiled, u_field)
+
+
+def test_sample():
+    """
+    The class should calculate the flow at arbitrary sample points, broadcast
+    against each other, equal to the flow on the grid of the same points
+    """
+    test_class = FlowFieldTest()
+    flow_field = test_class.instance
+    flow_field.calculate_wake()
+    x, y = np.meshgrid(np.linspace(-100.0, 500.0, 7), np.linspace(-100.0, 100.0, 5), indexing='ij')
+    z = np.full(x.shape, flow_field.hub_height)
+    plane = flow_field.sample(x, y, flow_field.hub_height)
+    assert plane.shape == (7, 5)
+    assert np.array_equal(plane, flow_field.calculate_flow_on_grid(x, y, z))
+
+    line = flow_field.sample(x[:, 2], 0.0, flow_field.hub_height)
+    assert np.allclose(line, plane[:, 2])
+    assert line[0] == flow_field.wind_speed and np.all(line[3:] < flow_field.wind_speed)
@@ -96,3 +96,36 @@ def test_sorted_in_x_as_list():
 def sorted_in_x_as_list(self):
     coords = sorted(self.turbine_map_dict, key=lambda coord: coord.x)
     return [(c, self.turbine_map_dict[c]) for c in coords]
+
+
+def test_rotor_grid():
+    """
+    The class should create a 4 x 4 grid over the rotor of every turbine.
+    With the wind along x, the grid of the first turbine should span its rotor
+    diameter in y about (0, 0) and in z about the hub height; a second call with
+    the same wind direction should return the cached grid.
+    """
+    test_class = TurbineMapTest()
+    x, y, z = test_class.instance.rotor_grid(0.0, 4)
+    assert np.shape(x) == (2, 4, 4)
+    assert np.allclose(x[0], 0.0) and np.allclose(x[1], 100.0)
+    assert np.allclose(y[0, :, 0], np.linspace(-63.0, 63.0, 4))
+    assert np.allclose(z[0, 0, :], np.linspace(27.0, 153.0, 4))
+    assert test_class.instance.rotor_grid(0.0, 4)[0] is x
+
+
+def test_rotor_grid_cache_size():
+    """
+    The class should only keep the rotor grids and wake influence indices of
+    the cache_size most recently used wind directions, shared by all turbine
+    maps
+    """
+    test_class = TurbineMapTest()
+    turbine_map = test_class.instance
+    for wind_direction in np.linspace(0.0, 1.0, 2 * TurbineMap.cache_size):
+        turbine_map.rotor_grid(wind_direction, 4)
+        turbine_map.wake_influence(wind_direction, 2.0, 0.5)
+    assert len(TurbineMap._rotor_grids) == TurbineMap.cache_size
+    assert len(TurbineMap._wake_influence) == TurbineMap.cache_size
+    x = turbine_map.rotor_grid(1.0, 4)[0]
+    assert test_class._build_instance().rotor_grid(1.0, 4)[0] is x
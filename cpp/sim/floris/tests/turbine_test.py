@@ -0,0 +1,113 @@
+"""
+Copyright 2017 NREL
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import copy
+import gc
+import numpy as np
+from floris.coordinate import Coordinate
+from floris.turbine import Turbine, PowerThrustCurve
+from floris.turbine_map import TurbineMap
+from .sample_inputs import SampleInputs
+from scipy.interpolate import interp1d
+
+
+class TurbineTest():
+    def __init__(self):
+        self.sample_inputs = SampleInputs()
+        self.instance = self._build_instance()
+        self.coordinate = Coordinate(100.0, 0.0)
+        turbine_map = TurbineMap({
+            Coordinate(0.0, 0.0): self._build_instance(),
+            self.coordinate: self.instance
+        })
+        self.x, self.y, self.z = turbine_map.rotor_grid(0.0, 4)
+
+    def _build_instance(self):
+        return Turbine(self.sample_inputs.turbine)
+
+
+def test_instantiation():
+    """
+    The class should initialize with the standard inputs
+    """
+    test_class = TurbineTest()
+    assert test_class.instance is not None
+
+
+def test_swept_area_velocities():
+    """
+    The class should average the flow field over the grid points nearest to
+    every rotor point, including all grid points at the same distance
+    """
+    test_class = TurbineTest()
+    x, y, z = test_class.x, test_class.y, test_class.z
+    coord = test_class.coordinate
+    turbine = test_class.instance
+    field = np.random.RandomState(0).uniform(5.0, 10.0, x.shape)
+
+    baseline = []
+    for h, v in turbine.grid:
+        dist = np.sqrt((coord.x - x)**2 + (coord.y + h - y)**2 + (turbine.hub_height + v - z)**2)
+        baseline.append(np.mean(field[dist == np.min(dist)]))
+
+    velocities = turbine._calculate_swept_area_velocities(0.0, field, coord, x, y, z)
+    assert np.allclose(velocities, baseline)
+
+
+def test_swept_area_index_cache():
+    """
+    The class should reuse the index map of the rotor points for the same
+    coordinate and grid, and rebuild it for a different coordinate
+    """
+    test_class = TurbineTest()
+    x, y, z = test_class.x, test_class.y, test_class.z
+    turbine = test_class.instance
+    index = turbine._swept_area_index(test_class.coordinate, x, y, z)
+    assert turbine._swept_area_index(test_class.coordinate, x.copy(), y, z) is index
+    assert turbine._swept_area_index(Coordinate(0.0, 0.0), x, y, z) is not index
+
+
+def test_power_thrust_curve():
+    """
+    Turbines with the same power_thrust_table should share a single curve,
+    which interpolates the table linearly, extrapolates it linearly above
+    its wind speeds and holds constant coefficients below them
+    """
+    test_class = TurbineTest()
+    turbine = test_class.instance
+    assert turbine.fCp.__self__ is test_class._build_instance().fCp.__self__
+
+    table = turbine.power_thrust_table
+    wind_speed = np.array([-1.0, 0.0, 3.0, 8.0, 12.5, 30.0, 35.0])
+    for name, function in (("power", turbine.fCp), ("thrust", turbine.fCt)):
+        baseline = interp1d(table["wind_speed"], table[name], fill_value='extrapolate')(wind_speed)
+        assert np.allclose(function(wind_speed)[1:], baseline[1:])
+    assert turbine.fCt(-1.0) == 0.99
+    assert turbine.fCp(-1.0) == max(table["power"])
+
+    curve = PowerThrustCurve.from_table(dict(table))
+    assert curve is turbine.fCp.__self__
+
+
+def test_power_thrust_curve_release():
+    """
+    A curve should only be kept while a turbine refers to it
+    """
+    table = copy.deepcopy(TurbineTest().sample_inputs.turbine["properties"]["power_thrust_table"])
+    table["power"] = [power * 0.5 for power in table["power"]]
+    key = tuple(tuple(table[name]) for name in ("wind_speed", "power", "thrust"))
+    curve = PowerThrustCurve.from_table(table)
+    assert PowerThrustCurve._curves[key] is curve
+    del curve
+    gc.collect()
+    assert key not in PowerThrustCurve._curves
@@ -0,0 +1,66 @@
+"""
+Copyright 2017 NREL
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import numpy as np
+from floris.coordinate import Coordinate
+from floris.turbine import Turbine
+from floris.wake_deflection import WakeDeflection, _max_over_equal_x
+from .sample_inputs import SampleInputs
+
+
+def _max_over_equal_x_loop(values, x_locations):
+    # reference: one pass over the grid for every unique x
+    values = values.copy()
+    for x in np.unique(x_locations):
+        values[..., x_locations == x] = np.max(values[..., x_locations == x], axis=-1, keepdims=True)
+    return values
+
+
+def test_jimenez():
+    """
+    Every point of the Jimenez deflection should take the maximum deflection
+    over the points with the same x, for every configuration of a batch, as
+    a loop over every unique x
+    """
+    sample_inputs = SampleInputs()
+    model = WakeDeflection("jimenez", sample_inputs.wake["properties"]["parameters"])
+    turbine = Turbine(sample_inputs.turbine)
+    turbine.yaw_angle = np.radians([10.0, -20.0]).reshape(-1, 1, 1, 1)
+    turbine.Ct = np.array([0.8, 0.6]).reshape(-1, 1, 1, 1)
+    x = np.random.RandomState(0).choice([0.0, 300.0, 630.0], (3, 4, 4))
+    y = np.zeros(x.shape)
+
+    deflection = model.function(x, y, turbine, Coordinate(0.0, 0.0), None)
+    assert deflection.shape == (2, 3, 4, 4)
+
+    # the deflection of every point on its own, i.e. before the grouped maximum
+    raw = np.zeros(deflection.shape)
+    for index in np.ndindex(x.shape):
+        point = model.function(x[index].reshape(1, 1, 1), y[index].reshape(1, 1, 1),
+                               turbine, Coordinate(0.0, 0.0), None)
+        raw[(Ellipsis,) + index] = point.reshape(-1)
+    assert np.array_equal(deflection, _max_over_equal_x_loop(raw, x))
+
+
+def test_max_over_equal_x():
+    """
+    Every point should take the maximum of the values over the points with
+    the same x, for every configuration of a batch, as a loop over every
+    unique x
+    """
+    rng = np.random.RandomState(0)
+    x = rng.choice([0.0, 300.0, 630.0], (3, 4, 4))
+    values = rng.normal(size=(2,) + x.shape)
+    grouped = _max_over_equal_x(values, x)
+    assert np.array_equal(grouped, _max_over_equal_x_loop(values, x))
+    assert not np.array_equal(grouped, values)
@@ -0,0 +1,65 @@
+"""
+Copyright 2017 NREL
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import numpy as np
+from .flow_field_test import FlowFieldTest
+
+
+def _gauss_baseline(model, x, y, z, turbine, coord, delta, flowfield):
+    # the gauss velocity deficit evaluated densely on every grid point
+    veer, TI, D, HH = flowfield.wind_veer, flowfield.turbulence_intensity, turbine.rotor_diameter, turbine.hub_height
+    yaw, tilt, Ct, U_local = -turbine.yaw_angle, turbine.tilt_angle, turbine.Ct, flowfield.initial_flowfield
+    uR = U_local*Ct*np.cos(tilt)*np.cos(yaw)/(2.*(1-np.sqrt(1-(Ct*np.cos(tilt)*np.cos(yaw)))))
+    u0 = U_local*np.sqrt(1-Ct)
+    sigma_z0 = D*0.5*np.sqrt(uR/(U_local + u0))
+    sigma_y0 = sigma_z0*np.cos(yaw)*np.cos(veer)
+    x0 = D*(np.cos(yaw)*(1+np.sqrt(1-Ct*np.cos(yaw)))) / (np.sqrt(2)*(4*model.alpha*TI + 2*model.beta*(1-np.sqrt(1-Ct)))) + coord.x
+    k = model.ka*TI + model.kb
+    xR = (y - coord.y)*np.tan(yaw) + coord.x
+
+    def deficit(sigma_y, sigma_z):
+        a = np.cos(veer)**2/(2*sigma_y**2) + np.sin(veer)**2/(2*sigma_z**2)
+        b = -np.sin(2*veer)/(4*sigma_y**2) + np.sin(2*veer)/(4*sigma_z**2)
+        c = np.sin(veer)**2/(2*sigma_y**2) + np.cos(veer)**2/(2*sigma_z**2)
+        dy, dz = y - coord.y - delta, z - HH
+        gauss = np.exp(-(a*dy**2 - 2*b*dy*dz + c*dz**2))
+        return U_local*(1-np.sqrt(1-Ct*np.cos(yaw)/(8.0*sigma_y*sigma_z/D**2)))*gauss
+
+    near_sigma = lambda sigma0: ((x0-x)/(x0-xR))*0.501*D*np.sqrt(Ct/2.) + ((x-xR)/(x0-xR))*sigma0
+    with np.errstate(all='ignore'):
+        near = np.where((x >= xR) & (x <= x0), deficit(near_sigma(sigma_y0), near_sigma(sigma_z0)), 0.0)
+        far = np.where(x >= x0, deficit(k*(x-x0) + sigma_y0, k*(x-x0) + sigma_z0), 0.0)
+    return np.sqrt(near**2 + far**2)
+
+
+def test_gauss():
+    """
+    The gauss velocity deficit, evaluated on the near and far wake points
+    separately, should equal the deficit evaluated on every grid point,
+    with and without veer
+    """
+    test_class = FlowFieldTest()
+    flow_field = test_class.instance
+    flow_field.calculate_wake()
+    coord, turbine = flow_field.turbine_map.rotated(
+        flow_field.wind_direction, flow_field.turbine_map.coords[0]).sorted_in_x_as_list()[0]
+    x, y, z = flow_field.x, flow_field.y, flow_field.z
+    model = flow_field.wake.velocity_model
+    delta = np.random.RandomState(0).uniform(-5.0, 5.0, x.shape)
+
+    for veer in (0.0, 0.1):
+        flow_field.wind_veer = veer
+        deficit = model.function(x, y, z, turbine, coord, delta, flow_field.wake, flow_field)
+        baseline = _gauss_baseline(model, x, y, z, turbine, coord, delta, flow_field)
+        assert np.allclose(deficit, baseline, rtol=1e-12, atol=0.0)
+        assert np.any(deficit > 0.0)
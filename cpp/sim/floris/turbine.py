@@ -9,9 +9,9 @@
 # CONDITIONS OF ANY KIND, either express or implied. See the License for the
 # specific language governing permissions and limitations under the License.
 
+import copy
+import weakref
 import numpy as np
-from scipy.interpolate import interp1d
-from scipy.interpolate import griddata
 
 class Turbine():
     """
@@ -91,7 +91,7 @@ class Turbine():
         # initialize to an invalid value until calculated
         self.velocities = [-1] * self.grid_point_count
         self.turbulence_intensity = -1
-        self.plotting = False
+        self._swept_area_cache = None
 
         # calculated attributes are
         # self.Ct         # Thrust Coefficient
@@ -154,64 +154,42 @@ class Turbine():
                * (1 - np.sqrt(1 - self.Ct * np.cos(self.yaw_angle) ) )
 
     def _CpCtWs(self):
-        cp = self.power_thrust_table["power"]
-        ct = self.power_thrust_table["thrust"]
-        windspeed = self.power_thrust_table["wind_speed"]
-
-        fCpInterp = interp1d(windspeed, cp, fill_value='extrapolate')
-        fCtInterp = interp1d(windspeed, ct, fill_value='extrapolate')
-
-        def fCp(Ws):
-            return max(cp) if Ws < min(windspeed) else fCpInterp(Ws)
-
-        def fCt(Ws):
-            return 0.99 if Ws < min(windspeed) else fCtInterp(Ws)
-
-        return fCp, fCt
+        curve = PowerThrustCurve.from_table(self.power_thrust_table)
+        return curve.cp, curve.ct
 
     def _calculate_swept_area_velocities(self, wind_direction, local_wind_speed, coord, x, y, z):
         """
             Initialize the turbine disk velocities used in the 3D model based on shear using the power log law.
         """
-        u_at_turbine = local_wind_speed
-        x_grid = x
-        y_grid = y
-        z_grid = z
+        starts, indices, counts = self._swept_area_index(coord, x, y, z)
 
-        yPts = np.array([point[0] for point in self.grid])
-        zPts = np.array([point[1] for point in self.grid])
+        # average the flow field over the grid points nearest to every rotor point
+        # (for a batch of flow fields, over the last axis of every field)
+        u_at_turbine = local_wind_speed.reshape(local_wind_speed.shape[:-x.ndim] + (-1,))
+        data = np.add.reduceat(u_at_turbine[..., indices], starts, axis=-1)
 
-        # interpolate from the flow field to get the flow field at the grid points
-        dist = [np.sqrt( (coord.x - x_grid)**2 + (coord.y+yPts[i] - y_grid)**2 + (self.hub_height+zPts[i] - z_grid)**2  ) for i in range(len(yPts))]
+        return data / counts
 
-        idx = [np.where(dist[i]==np.min(dist[i])) for i in range(len(yPts))]
-        
-        data = [u_at_turbine[idx[i]] for i in range(len(yPts))]
-
-        data = [np.mean(u_at_turbine[idx[i]]) for i in range(len(yPts))]
-
-        return np.array(data)
-
-    def _calculate_swept_area_velocities_visualization(self, grid_resolution, local_wind_speed, coord, x, y, z):
-
-        dx = (np.max(x) - np.min(x)) / grid_resolution.x
-        dy = (np.max(y) - np.min(y)) / grid_resolution.y
-        mask = \
-            (x <= coord.x + dx) & (x >= (coord.x - dx)) & \
-            (y <= coord.y + dy) & (y >= coord.y - dy) & \
-            (z < self.hub_height + self.rotor_radius) & (z > self.hub_height - self.rotor_radius)
-        u_at_turbine = local_wind_speed[mask]
-        x_grid = x[mask]
-        y_grid = y[mask]
-        z_grid = z[mask]
-        data = np.zeros(len(self.grid))
-        for i, point in enumerate(self.grid):
-            data[i] = griddata(
-                (x_grid, y_grid, z_grid),
-                u_at_turbine,
-                (coord.x, coord.y + point[0], self.hub_height + point[1]),
-                method='nearest')
-        return data
+    def _swept_area_index(self, coord, x, y, z):
+        """
+            Map every rotor point to the flat indices of its nearest grid points
+            (all of them in case of ties), grouped per rotor point with the start
+            and count of every group. The map only depends on the turbine
+            coordinate and the grid, so it is cached for the last coordinate and grid.
+        """
+        key = (coord.x, coord.y, x.tobytes(), y.tobytes(), z.tobytes())
+        if self._swept_area_cache is None or self._swept_area_cache[0] != key:
+            yPts = np.array([point[0] for point in self.grid])[:, None]
+            zPts = np.array([point[1] for point in self.grid])[:, None]
+
+            # distance from every rotor point (rows) to every grid point (columns)
+            dist = np.sqrt( (coord.x - x.ravel())**2 + (coord.y+yPts - y.ravel())**2 + (self.hub_height+zPts - z.ravel())**2  )
+
+            points, indices = np.nonzero(dist == np.min(dist, axis=1, keepdims=True))
+            counts = np.bincount(points, minlength=len(self.grid))
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            self._swept_area_cache = (key, (starts, indices, counts))
+        return self._swept_area_cache[1]
 
     # Public methods
 
@@ -239,41 +217,41 @@ class Turbine():
         local_wind_speed = flowfield.initial_flowfield - u_wake
 
         # update turbine quantities
-        if self.plotting:
-            self.initial_velocities = self._calculate_swept_area_velocities_visualization(
-                                        flowfield.grid_resolution,
-                                        flowfield.initial_flowfield,
-                                        coord,
-                                        rotated_x,
-                                        rotated_y,
-                                        rotated_z)
-            self.velocities = self._calculate_swept_area_velocities_visualization(
-                                        flowfield.grid_resolution,
-                                        local_wind_speed,
-                                        coord,
-                                        rotated_x,
-                                        rotated_y,
-                                        rotated_z)
-        else:
-            self.initial_velocities = self._calculate_swept_area_velocities(
-                                        flowfield.wind_direction,
-                                        flowfield.initial_flowfield,
-                                        coord,
-                                        rotated_x,
-                                        rotated_y,
-                                        rotated_z)
-            self.velocities = self._calculate_swept_area_velocities(
-                                        flowfield.wind_direction,
-                                        local_wind_speed,
-                                        coord,
-                                        rotated_x,
-                                        rotated_y,
-                                        rotated_z)
+        self.initial_velocities = self._calculate_swept_area_velocities(
+                                    flowfield.wind_direction,
+                                    flowfield.initial_flowfield,
+                                    coord,
+                                    rotated_x,
+                                    rotated_y,
+                                    rotated_z)
+        self.velocities = self._calculate_swept_area_velocities(
+                                    flowfield.wind_direction,
+                                    local_wind_speed,
+                                    coord,
+                                    rotated_x,
+                                    rotated_y,
+                                    rotated_z)
         self.Cp = self._calculate_cp()
         self.Ct = self._calculate_ct()
         self.power = self._calculate_power()
         self.aI = self._calculate_ai()
 
+    def copy(self):
+        """
+        Returns a copy of the turbine that shares the data that does not
+        change after initialization (power_thrust_table, Cp/Ct curves and
+        swept area grid) with this turbine, instead of deep copying it
+
+        inputs:
+            none
+
+        outputs:
+            turbine: Turbine - the copied Turbine object
+        """
+        turbine = copy.copy(self)
+        turbine._swept_area_cache = None
+        return turbine
+
     def set_yaw_angle(self, angle):
         """
         Sets the turbine yaw angle
@@ -287,4 +265,63 @@ class Turbine():
         self.yaw_angle = np.radians(angle)
 
     def get_average_velocity(self):
-        return np.mean(self.velocities)
+        # for a batch of rotor velocities, the averages broadcast against
+        # (batch, turbine, rotor point, rotor point) flow fields
+        average = np.mean(self.velocities, axis=-1)
+        return average if np.ndim(average) == 0 else average.reshape(-1, 1, 1, 1)
+
+
+class PowerThrustCurve():
+    """
+    PowerThrustCurve interpolates the power and thrust coefficients of a
+    power_thrust_table linearly in the wind speed, extrapolating linearly
+    above the table; below the table, Cp is its maximum and Ct is 0.99.
+    Turbines with the same table share a single curve (see from_table).
+
+    inputs:
+        power_thrust_table: dict - the "power", "thrust" and "wind_speed"
+            lists of a Turbine
+
+    outputs:
+        self: PowerThrustCurve - an instantiated PowerThrustCurve object
+    """
+
+    # the curves in use, released once no turbine refers to them any more
+    _curves = weakref.WeakValueDictionary()
+
+    def __init__(self, power_thrust_table):
+        order = np.argsort(power_thrust_table["wind_speed"], kind="stable")
+        self.wind_speed = np.asarray(power_thrust_table["wind_speed"], dtype=float)[order]
+        self.power = np.asarray(power_thrust_table["power"], dtype=float)[order]
+        self.thrust = np.asarray(power_thrust_table["thrust"], dtype=float)[order]
+        self.min_wind_speed = self.wind_speed[0]
+        self.max_power = np.max(self.power)
+
+    @classmethod
+    def from_table(cls, power_thrust_table):
+        """
+        Returns the curve of a power_thrust_table, created once per distinct
+        table content among the curves in use.
+        """
+        key = tuple(tuple(power_thrust_table[name]) for name in ("wind_speed", "power", "thrust"))
+        curve = cls._curves.get(key)
+        if curve is None:
+            curve = cls(power_thrust_table)
+            cls._curves[key] = curve
+        return curve
+
+    def _interpolate(self, wind_speed, values):
+        # np.interp clamps to the end values, so extrapolate the last segment beyond the table
+        x, y = self.wind_speed, values
+        slope = (y[-1] - y[-2]) / (x[-1] - x[-2])
+        return np.where(wind_speed > x[-1],
+                        y[-1] + slope * (wind_speed - x[-1]),
+                        np.interp(wind_speed, x, y))
+
+    def cp(self, wind_speed):
+        return np.where(wind_speed < self.min_wind_speed, self.max_power,
+                        self._interpolate(wind_speed, self.power))
+
+    def ct(self, wind_speed):
+        return np.where(wind_speed < self.min_wind_speed, 0.99,
+                        self._interpolate(wind_speed, self.thrust))
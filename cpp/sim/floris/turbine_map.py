@@ -11,6 +11,7 @@
 
 from .coordinate import Coordinate
 from .turbine import Turbine
+import collections
 import numpy as np
 
 
@@ -38,6 +39,14 @@ class TurbineMap():
         self: TurbineMap - an instantiated TurbineMap object
     """
 
+    # rotor grids and wake influence indices, keyed on the layout and the wind
+    # direction and shared by all turbine maps, such that rebuilt farms reuse
+    # them; only the most recently used ones are kept, as every wind direction
+    # of a sweep adds its own entries
+    _rotor_grids = collections.OrderedDict()
+    _wake_influence = collections.OrderedDict()
+    cache_size = 64
+
     def __init__(self, turbine_map_dict):
         self.turbine_map_dict = turbine_map_dict
         self.coords = [coord for coord, _ in self.items()]
@@ -62,3 +71,83 @@ class TurbineMap():
     def sorted_in_x_as_list(self):
         coords = sorted(self.turbine_map_dict, key=lambda coord: coord.x)
         return [(c, self.turbine_map_dict[c]) for c in coords]
+
+    def rotor_grid(self, wind_direction, rotor_points):
+        """
+        Returns the x, y and z components of a rotor_points x rotor_points
+        grid over the rotor of every turbine, rotated about the turbine by
+        the wind direction (in radians). The grid only depends on the layout
+        and the wind direction, so it is computed once and cached; the
+        returned arrays are read-only.
+        """
+        layout = tuple((coord.x, coord.y, turbine.rotor_radius, turbine.hub_height)
+                       for coord, turbine in self.items())
+        key = (wind_direction, rotor_points, layout)
+        grids = _cache_get(self._rotor_grids, key)
+        if grids is None:
+            x, y, radius, hub_height = (np.array(values) for values in zip(*layout))
+
+            # every turbine gets its own rotor_points x rotor_points grid
+            yt = np.linspace(y - radius, y + radius, rotor_points, axis=1)
+            zt = np.linspace(hub_height - radius, hub_height + radius, rotor_points, axis=1)
+            shape = (len(layout), rotor_points, rotor_points)
+            x, y = x[:, None, None], y[:, None, None]
+            xoffset = np.zeros(shape)
+            yoffset = np.broadcast_to(yt[:, :, None], shape) - y
+            z_grid = np.broadcast_to(zt[:, None, :], shape).copy()
+
+            # rotate the grid about the turbine
+            x_grid = xoffset * np.cos(-wind_direction) - yoffset * np.sin(-wind_direction) + x
+            y_grid = yoffset * np.cos(-wind_direction) + xoffset * np.sin(-wind_direction) + y
+            for grid in (x_grid, y_grid, z_grid):
+                grid.flags.writeable = False
+            grids = (x_grid, y_grid, z_grid)
+            _cache_put(self._rotor_grids, key, grids, self.cache_size)
+        return grids
+
+    def wake_influence(self, wind_direction, margin, spread):
+        """
+        Returns, for every turbine, the indices (into turbines) of the
+        turbines inside its wake cone in the frame of reference of the wind
+        direction (in radians): the turbines that are at most one rotor
+        diameter upstream of it and whose lateral offset is within margin
+        rotor diameters, widened by spread times the downstream distance.
+        The index only depends on the layout and the wind direction, so it
+        is computed once and cached.
+        """
+        layout = tuple((coord.x, coord.y, turbine.rotor_diameter)
+                       for coord, turbine in self.items())
+        key = (wind_direction, margin, spread, layout)
+        influence = _cache_get(self._wake_influence, key)
+        if influence is None:
+            rotated = [coord.rotate_z(wind_direction) for coord in self.coords]
+            x, y = (np.array(values) for values in zip(*rotated))
+            diameter = np.array([turbine.rotor_diameter for turbine in self.turbines])
+
+            # sweep the turbines sorted in x: the candidates of a turbine are
+            # a suffix of the order, which is then filtered on the lateral band
+            order = np.argsort(x, kind="stable")
+            starts = np.searchsorted(x[order], x - diameter, side="left")
+            influence = []
+            for i, start in enumerate(starts):
+                candidates = order[start:]
+                dx = x[candidates] - x[i]
+                band = diameter[i] * margin + spread * np.maximum(dx, 0.0)
+                influence.append(np.sort(candidates[np.abs(y[candidates] - y[i]) <= band]))
+            _cache_put(self._wake_influence, key, influence, self.cache_size)
+        return influence
+
+
+def _cache_get(cache, key):
+    # the cached value of key (marked as most recently used), or None
+    if key not in cache:
+        return None
+    cache.move_to_end(key)
+    return cache[key]
+
+
+def _cache_put(cache, key, value, size):
+    # caches the value of key, forgetting the least recently used values beyond size
+    cache[key] = value
+    while len(cache) > size:
+        cache.popitem(last=False)
@@ -21,12 +21,19 @@ class VisualizationManager():
 
     IT IS IMPORTANT to note that this class should be treated as a singleton. That is,
     only one instance of this class should exist.
+
+    The turbine quantities are calculated on the rotor grids of the flow field. The
+    flow is sampled from them (FlowField.sample) only on the planes that are plotted,
+    or on the whole grid on the first use of u_field, in tiles of at most tile_points
+    points (by max_workers processes, if given).
     """
 
-    def __init__(self, flowfield, grid_resolution=(100, 100, 25)):
+    def __init__(self, flowfield, grid_resolution=(100, 100, 25), tile_points=2**18, max_workers=None):
         self.figure_count = 0
         self.flowfield = flowfield
         self.grid_resolution = Coordinate(grid_resolution[0], grid_resolution[1], grid_resolution[2])
+        self.tile_points = tile_points
+        self.max_workers = max_workers
         self._initialize_flowfield_for_plotting()
 
     # General plotting functions
@@ -73,23 +80,38 @@ class VisualizationManager():
 
     # FLORIS-specific data manipulation and plotting
     def _initialize_flowfield_for_plotting(self):
-        self.flowfield.grid_resolution = self.grid_resolution
         self.flowfield.xmin, self.flowfield.xmax, self.flowfield.ymin, self.flowfield.ymax, self.flowfield.zmin, self.flowfield.zmax = self._set_domain_bounds()
-        self.flowfield.x, self.flowfield.y, self.flowfield.z = self._discretize_freestream_domain()
-        self.flowfield.initial_flowfield = self.flowfield._initial_flowfield()
-        self.flowfield.u_field = self.flowfield._initial_flowfield()
-        for turbine in self.flowfield.turbine_map.turbines:
-            turbine.plotting = True
+        self.x, self.y, self.z = self._discretize_freestream_domain()
+        self._u_field = None
         self.flowfield.calculate_wake()
 
     def _discretize_freestream_domain(self):
         """
-        Generate a structured grid for the entire flow field domain.
+        Generate a structured grid for the entire flow field domain. The grid
+        components are read-only views of the axes, so they take no memory.
+        """
+        x = np.linspace(self.flowfield.xmin, self.flowfield.xmax, self.grid_resolution.x)
+        y = np.linspace(self.flowfield.ymin, self.flowfield.ymax, self.grid_resolution.y)
+        z = np.linspace(self.flowfield.zmin, self.flowfield.zmax, self.grid_resolution.z)
+        axes = (axis.astype(self.flowfield.dtype, copy=False) for axis in (x, y, z))
+        return np.broadcast_arrays(*np.meshgrid(*axes, indexing='ij', sparse=True))
+
+    @property
+    def u_field(self):
+        """
+        The flow speed on the whole visualization grid, calculated on first use.
         """
-        x = np.linspace(self.flowfield.xmin, self.flowfield.xmax, self.flowfield.grid_resolution.x)
-        y = np.linspace(self.flowfield.ymin, self.flowfield.ymax, self.flowfield.grid_resolution.y)
-        z = np.linspace(self.flowfield.zmin, self.flowfield.zmax, self.flowfield.grid_resolution.z)
-        return np.meshgrid(x, y, z, indexing='ij')
+        if self._u_field is None:
+            self._u_field = self._calculate_flow(Ellipsis)
+        return self._u_field
+
+    def _calculate_flow(self, index):
+        # flow speed on the part of the visualization grid selected by index (e.g., a plane)
+        if self._u_field is not None:
+            return self._u_field[index]
+        if index is Ellipsis:
+            return self.flowfield.calculate_flow_on_grid(self.x, self.y, self.z, self.tile_points, self.max_workers)
+        return self.flowfield.sample(self.x[index], self.y[index], self.z[index], self.tile_points, self.max_workers)
 
     def _set_domain_bounds(self):
         coords = self.flowfield.turbine_map.coords
@@ -124,30 +146,30 @@ class VisualizationManager():
             ymesh, zmesh, data, 'x plane', 'y (m)', 'z (m)', colorbar_label='Flow speed (m/s)', **kwargs)
 
     def _add_z_plane(self, percent_height=0.5, **kwargs):
-        plane = int(self.flowfield.grid_resolution.z * percent_height)
+        plane = int(self.grid_resolution.z * percent_height)
         self._plot_constant_z(
-            self.flowfield.x[:, :, plane],
-            self.flowfield.y[:, :, plane],
-            self.flowfield.u_field[:, :, plane],
+            self.x[:, :, plane],
+            self.y[:, :, plane],
+            self._calculate_flow(np.s_[:, :, plane]),
             **kwargs)
         for coord, turbine in self.flowfield.turbine_map.items():
             self._add_turbine_marker(
                 turbine, coord, self.flowfield.wind_direction)
 
     def _add_y_plane(self, percent_height=0.5, **kwargs):
-        plane = int(self.flowfield.grid_resolution.y * percent_height)
+        plane = int(self.grid_resolution.y * percent_height)
         self._plot_constant_y(
-            self.flowfield.x[:, plane, :],
-            self.flowfield.z[:, plane, :],
-            self.flowfield.u_field[:, plane, :],
+            self.x[:, plane, :],
+            self.z[:, plane, :],
+            self._calculate_flow(np.s_[:, plane, :]),
             **kwargs)
 
     def _add_x_plane(self, percent_height=0.5, **kwargs):
-        plane = int(self.flowfield.grid_resolution.x * percent_height)
+        plane = int(self.grid_resolution.x * percent_height)
         self._plot_constant_x(
-            self.flowfield.y[plane, :, :],
-            self.flowfield.z[plane, :, :],
-            self.flowfield.u_field[plane, :, :],
+            self.y[plane, :, :],
+            self.z[plane, :, :],
+            self._calculate_flow(np.s_[plane, :, :]),
             **kwargs)
 
     def plot_z_planes(self, planes, **kwargs):
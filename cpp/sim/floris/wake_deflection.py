@@ -39,9 +39,13 @@ class WakeDeflection():
         # this function defines the angle at which the wake deflects in relation to the yaw of the turbine
         # this is coded as defined in the Jimenez et. al. paper
 
+        # turbine quantities in the precision of the grid
+        yaw_angle = np.asarray(turbine.yaw_angle, x_locations.dtype)
+        Ct = np.asarray(turbine.Ct, x_locations.dtype)
+
         # angle of deflection
-        xi_init = (1. / 2.) * np.cos(turbine.yaw_angle) * \
-            np.sin(turbine.yaw_angle) * turbine.Ct
+        xi_init = (1. / 2.) * np.cos(yaw_angle) * \
+            np.sin(yaw_angle) * Ct
         # xi = xi_init / (1 + 2 * self.kd * x_locations / turbine.rotor_diameter)**2
         
         x_locations = x_locations - coord.x
@@ -55,12 +59,8 @@ class WakeDeflection():
         # corrected yaw displacement with lateral offset
         deflection = yYaw_init + self.ad + self.bd * x_locations
 
-        x = np.unique(x_locations)
-        for i in range(len(x)):
-            tmp = np.max(deflection[x_locations == x[i]])
-            deflection[x_locations == x[i]] = tmp
-
-        return deflection
+        # every point takes the maximum deflection over the points with the same x
+        return _max_over_equal_x(deflection, x_locations)
 
     def _gauss_deflection(self, x_locations, y_locations, turbine, coord, flowfield):
 
@@ -68,7 +68,7 @@ class WakeDeflection():
         wind_speed    = flowfield.wind_speed             # free-stream velocity (m/s)
         TI_0    = flowfield.turbulence_intensity   # turbulence intensity (%/100)
         veer    = flowfield.wind_veer                   # veer (rad), should be deg in the input file and then converted internally
-        TI      = turbine.turbulence_intensity   # just a placeholder for now, should be computed with turbine
+        TI      = np.asarray(turbine.turbulence_intensity, x_locations.dtype)   # just a placeholder for now, should be computed with turbine
         
         # hard-coded model input data (goes in input file)
         ka      = self.ka                      # wake expansion parameter
@@ -78,12 +78,12 @@ class WakeDeflection():
         ad      = self.ad                      # natural lateral deflection parameter
         bd      = self.bd                      # natural lateral deflection parameter
 
-        # turbine parameters
+        # turbine parameters (in the precision of the grid)
         D           = turbine.rotor_diameter
         HH          = turbine.hub_height
-        yaw         = -turbine.yaw_angle         # opposite sign convention in this model
-        tilt        = turbine.tilt_angle
-        Ct          = turbine.Ct
+        yaw         = -np.asarray(turbine.yaw_angle, x_locations.dtype)         # opposite sign convention in this model
+        tilt        = np.asarray(turbine.tilt_angle, x_locations.dtype)
+        Ct          = np.asarray(turbine.Ct, x_locations.dtype)
 
         # U_local = flowfield.wind_speed # just a placeholder for now, should be initialized with the flowfield
         U_local = flowfield.initial_flowfield
@@ -133,3 +133,14 @@ class WakeDeflection():
         deflection = delta_near_wake + delta_far_wake
 
         return deflection
+
+
+def _max_over_equal_x(values, x_locations):
+    # the maximum of the values over the points with the same x, at every point
+    # (grouped over the flattened grid; a batch keeps its leading axis)
+    x, groups = np.unique(x_locations, return_inverse=True)
+    order = np.argsort(groups.ravel(), kind="stable")
+    starts = np.searchsorted(groups.ravel()[order], np.arange(len(x)))
+    flat = values.reshape(values.shape[:values.ndim - x_locations.ndim] + (-1,))
+    grouped = np.maximum.reduceat(flat[..., order], starts, axis=-1)
+    return grouped[..., groups.ravel()].reshape(values.shape)
@@ -65,6 +65,9 @@ class WakeVelocity():
         # compute the velocity deficit based on the classic Jensen/Park model. see Jensen 1983
         # +/- 2keX is the slope of the cone boundary for the wake
 
+        # turbine quantities in the precision of the grid
+        aI = np.asarray(turbine.aI, x_locations.dtype)
+
         # define the boundary of the wake model ... y = mx + b
         m = self.we
         x = x_locations - turbine_coord.x
@@ -83,14 +86,15 @@ class WakeVelocity():
              (2 * self.we * (x_locations - turbine_coord.x) + turbine.rotor_diameter))**2
 
         # filter points upstream and beyond the upper and lower bounds of the wake
-        c[x_locations - turbine_coord.x < 0] = 0
-        c[y_locations > y_upper] = 0
-        c[y_locations < y_lower] = 0
+        # (the bounds may have a leading batch axis through the deflection field)
+        c = np.where(x_locations - turbine_coord.x < 0, 0, c)
+        c = np.where(y_locations > y_upper, 0, c)
+        c = np.where(y_locations < y_lower, 0, c)
 
-        c[z_locations > z_upper] = 0
-        c[z_locations < z_lower] = 0
+        c = np.where(z_locations > z_upper, 0, c)
+        c = np.where(z_locations < z_lower, 0, c)
 
-        return 2 * turbine.aI * c * flowfield.initial_flowfield
+        return 2 * aI * c * flowfield.initial_flowfield
 
     def _floris(self, x_locations, y_locations, z_locations, turbine, turbine_coord, deflection_field, wake, flowfield):
         # compute the velocity deficit based on wake zones, see Gebraad et. al. 2016
@@ -101,7 +105,8 @@ class WakeVelocity():
         bU = self.bU
         radius = turbine.rotor_radius
         diameter = turbine.rotor_diameter
-        mu = self.mU / np.cos( (aU + bU * np.degrees(turbine.yaw_angle))*np.pi/180. )
+        mu = [np.asarray(mU / np.cos( (aU + bU * np.degrees(turbine.yaw_angle))*np.pi/180. ), x_locations.dtype) for mU in self.mU]
+        aI = np.asarray(turbine.aI, x_locations.dtype)
         we = self.we
 
         wind_speed = flowfield.wind_speed
@@ -116,8 +121,8 @@ class WakeVelocity():
         farwake = (radius + we * me[1] * dx)
         mixing = (radius + we * me[2] * dx)
 
-        # initialize the wake field
-        c = np.zeros(x_locations.shape)
+        # initialize the wake field (with a leading batch axis for batched yaw angles)
+        c = np.zeros(np.broadcast(x_locations, rY, dx * mu[0]).shape, x_locations.dtype)
 
         # near wake zone
         mask = rY <= nearwake
@@ -149,9 +154,9 @@ class WakeVelocity():
         #c += mask * (radius / (radius + we * mu[2] * dx))**2
 
         # filter points upstream
-        c[x_locations - turbine_coord.x < 0] = 0
+        c[..., x_locations - turbine_coord.x < 0] = 0
 
-        return wind_speed * 2 * turbine.aI * c
+        return wind_speed * 2 * aI * c
     
     def _gauss(self, x_locations, y_locations, z_locations, turbine, turbine_coord, deflection_field, wake, flowfield):
 
@@ -176,72 +181,96 @@ class WakeVelocity():
 
         # =======================================================================================================
                 
-        # turbine parameters
+        # turbine parameters (in the precision of the grid)
+        dtype       = x_locations.dtype
         D           = turbine.rotor_diameter
         HH          = turbine.hub_height
-        yaw         = -turbine.yaw_angle         # opposite sign convention in this model
-        tilt        = turbine.tilt_angle
-        Ct          = turbine.Ct
+        yaw         = -np.asarray(turbine.yaw_angle, dtype)         # opposite sign convention in this model
+        tilt        = np.asarray(turbine.tilt_angle, dtype)
+        Ct          = np.asarray(turbine.Ct, dtype)
         U_local     = flowfield.initial_flowfield
 
         # wake deflection
         delta = deflection_field
-        
-        # initial velocity deficits
-        uR      = U_local*Ct*np.cos(tilt)*np.cos(yaw)/(2.*(1-np.sqrt(1-(Ct*np.cos(tilt)*np.cos(yaw)))))
-        u0      = U_local*np.sqrt(1-Ct)
-        
-        # initial Gaussian wake expansion
-        sigma_z0    = D*0.5*np.sqrt( uR/(U_local + u0) )
-        sigma_y0    = sigma_z0*(np.cos((yaw)))*(np.cos(veer))
+
+        # quantities per turbine (or per configuration of a batch), computed once
+        cos_yaw     = np.cos(yaw)
+        cos_tilt    = np.cos(tilt)
+        cos_veer2   = np.cos(veer)**2
+        sin_veer2   = np.sin(veer)**2
+        sin_2veer   = np.sin(2*veer)
 
         # quantity that determines when the far wake starts
-        x0      = D*(np.cos(yaw)*(1+np.sqrt(1-Ct*np.cos(yaw)))) / (np.sqrt(2)*(4*alpha*TI + 2*beta*(1-np.sqrt(1-Ct)))) + turbine_coord.x
+        x0      = D*(cos_yaw*(1+np.sqrt(1-Ct*cos_yaw))) / (np.sqrt(2)*(4*alpha*TI + 2*beta*(1-np.sqrt(1-Ct)))) + turbine_coord.x
 
         # wake expansion parameters
         ky      = ka*TI + kb 
         kz      = ka*TI + kb
 
-        # initial wake velocity deficit (quantities based on Porte-Agel/Bastankah 2016 JFM)
-        C0       = 1 - u0/wind_speed
-        M0       = C0*(2-C0)    
-        E0       = C0**2 - 3*np.exp(1./12.)*C0 + 3*np.exp(1./3.)
-        
         ## COMPUTE VELOCITY DEFICIT
         yR      = y_locations - turbine_coord.y
-        xR      = yR*np.tan(yaw) + turbine_coord.x
-                 
-        # velocity deficit in the near wake
-        sigma_y = (((x0-xR)-(x_locations-xR))/(x0-xR))*0.501*D*np.sqrt(Ct/2.) + ((x_locations-xR)/(x0-xR))*sigma_y0
-        sigma_z = (((x0-xR)-(x_locations-xR))/(x0-xR))*0.501*D*np.sqrt(Ct/2.) + ((x_locations-xR)/(x0-xR))*sigma_z0
-
-        sigma_y[x_locations < xR] = 0.5*D
-        sigma_z[x_locations < xR] = 0.5*D
-
-        a = (np.cos(veer)**2)/(2*sigma_y**2) + (np.sin(veer)**2)/(2*sigma_z**2)
-        b = -(np.sin(2*veer))/(4*sigma_y**2) + (np.sin(2*veer))/(4*sigma_z**2)
-        c = (np.sin(veer)**2)/(2*sigma_y**2) + (np.cos(veer)**2)/(2*sigma_z**2)
-        totGauss = np.exp( -( a*((y_locations-turbine_coord.y)-delta)**2 - 2*b*((y_locations-turbine_coord.y)-delta)*((z_locations-HH)) + c*((z_locations-HH))**2 ) )
-
-        velDef = (U_local*(1-np.sqrt(1-((Ct*np.cos(yaw))/(8.0*sigma_y*sigma_z/D**2)) ) )*totGauss)
-        velDef[x_locations < xR] = 0     
-        velDef[x_locations > x0] = 0
-              
-        # wake expansion in the lateral (y) and the vertical (z) 
-        sigma_y = ky*( x_locations - x0 ) + sigma_y0
-        sigma_z = kz*( x_locations - x0 ) + sigma_z0
-
-        sigma_y[x_locations < x0] = sigma_y0[x_locations < x0]
-        sigma_z[x_locations < x0] = sigma_z0[x_locations < x0]
-
-        # velocity deficit outside the near wake
-        a = (np.cos(veer)**2)/(2*sigma_y**2) + (np.sin(veer)**2)/(2*sigma_z**2)
-        b = -(np.sin(2*veer))/(4*sigma_y**2) + (np.sin(2*veer))/(4*sigma_z**2)
-        c = (np.sin(veer)**2)/(2*sigma_y**2) + (np.cos(veer)**2)/(2*sigma_z**2)
-        totGauss = np.exp( -( a*((y_locations-turbine_coord.y)-delta)**2 - 2*b*((y_locations-turbine_coord.y)-delta)*((z_locations-HH)) + c*((z_locations-HH))**2 ) )
-        
-        # compute velocities in the far wake
-        velDef1 = (U_local*(1-np.sqrt(1-((Ct*np.cos(yaw))/(8.0*sigma_y*sigma_z/D**2)) ) )*totGauss)
-        velDef1[x_locations < x0] = 0
-                  
-        return np.sqrt(velDef**2 + velDef1**2)
+        shape   = np.broadcast_shapes(np.shape(x_locations), np.shape(yaw), np.shape(x0), np.shape(delta), np.shape(Ct))
+        xR      = flowfield.work_buffer("gauss_xR", shape)
+        np.multiply(yR, np.tan(yaw), out=xR)
+        xR     += turbine_coord.x
+
+        # the near wake covers xR <= x <= x0 and the far wake x >= x0 (both apply at x0)
+        near    = flowfield.work_buffer("gauss_near", shape, bool)
+        far     = flowfield.work_buffer("gauss_far", shape, bool)
+        np.greater_equal(x_locations, xR, out=near)
+        np.logical_and(near, x_locations <= x0, out=near)
+        np.greater_equal(x_locations, x0, out=far)
+
+        # squared velocity deficits of both wakes, each evaluated on its own points only
+        velDef2 = np.zeros(shape, dtype)
+        for in_wake in (near, far):
+            if not in_wake.any():
+                continue
+            U, C, cy = (_gather(values, in_wake) for values in (U_local, Ct, cos_yaw))
+
+            # initial velocity deficits
+            uR      = U*C*cos_tilt*cy/(2.*(1-np.sqrt(1-(C*cos_tilt*cy))))
+            u0      = U*np.sqrt(1-C)
+
+            # initial Gaussian wake expansion
+            sigma_z0    = D*0.5*np.sqrt( uR/(U + u0) )
+            sigma_y0    = sigma_z0*(cy)*(np.cos(veer))
+            del uR, u0
+
+            x, x0_w = _gather(x_locations, in_wake), _gather(x0, in_wake)
+            if in_wake is near:
+                # velocity deficit in the near wake
+                xR_w = _gather(xR, in_wake)
+                sigma_y = (((x0_w-xR_w)-(x-xR_w))/(x0_w-xR_w))*0.501*D*np.sqrt(C/2.) + ((x-xR_w)/(x0_w-xR_w))*sigma_y0
+                sigma_z = (((x0_w-xR_w)-(x-xR_w))/(x0_w-xR_w))*0.501*D*np.sqrt(C/2.) + ((x-xR_w)/(x0_w-xR_w))*sigma_z0
+                del xR_w
+            else:
+                # wake expansion in the lateral (y) and the vertical (z)
+                sigma_y = _gather(ky, in_wake)*( x - x0_w ) + sigma_y0
+                sigma_z = _gather(kz, in_wake)*( x - x0_w ) + sigma_z0
+            del x, x0_w, sigma_y0, sigma_z0
+
+            dy = _gather(yR, in_wake) - _gather(delta, in_wake)
+            dz = _gather(z_locations, in_wake) - HH
+            if veer == 0:
+                # without veer, b vanishes and a and c reduce to a single term
+                a = (cos_veer2)/(2*sigma_y**2)
+                c = (cos_veer2)/(2*sigma_z**2)
+                totGauss = np.exp( -( a*(dy)**2 + c*(dz)**2 ) )
+            else:
+                a = (cos_veer2)/(2*sigma_y**2) + (sin_veer2)/(2*sigma_z**2)
+                b = -(sin_2veer)/(4*sigma_y**2) + (sin_2veer)/(4*sigma_z**2)
+                c = (sin_veer2)/(2*sigma_y**2) + (cos_veer2)/(2*sigma_z**2)
+                totGauss = np.exp( -( a*(dy)**2 - 2*b*(dy)*(dz) + c*(dz)**2 ) )
+                del b
+            del a, c, dy, dz
+
+            velDef = (U*(1-np.sqrt(1-((C*cy)/(8.0*sigma_y*sigma_z/D**2)) ) )*totGauss)
+            velDef2[in_wake] += velDef**2
+
+        return np.sqrt(velDef2, out=velDef2)
+
+
+def _gather(values, mask):
+    # the values (broadcast against the mask) at the points where the mask holds
+    return np.broadcast_to(values, mask.shape)[mask]
@@ -7,11 +7,13 @@ Wrapper around FLORIS predictions.
 @date: 28/11/2017
 """
 
+import concurrent.futures
 import copy
 import itertools
 import json
 import matplotlib.pyplot as plt
 import numpy as np
+import os
 import scipy.stats
 import pickle
 import time
@@ -21,9 +23,16 @@ import floris
 class FlorisWrapper:
     """
     Call object.run(yaws) to simulate wake and retrieve the power production for each turbine.
+
+    The FLORIS model is built once, on the first run. Later runs only update the yaw angles
+    (and the wind speed, if it changed in the site) of the existing farm and recompute the wake.
+    Call object.reset() after changing anything else in the site. A new wind speed rebuilds the flow field, which
+    empties its wake cache (see FlowField.calculate_wake), so runs at randomized wind speeds do not reuse wakes.
+
+    The dtype sets the precision of the FLORIS flow field (see precision_validation.py for the error of np.float32).
     """
 
-    def __init__(self, turbine_positions):
+    def __init__(self, turbine_positions, dtype=np.float64):
         # Read turbine and site specs
         with open('configs/specs_NREL_5MW.json', 'r') as f:
             self.turbine_specs = json.load(f)
@@ -40,9 +49,25 @@ class FlorisWrapper:
             self.site["farm"]["properties"]["layout_y"].append(y)
             self.site["turbines"].append(copy.deepcopy(self.turbine_specs))
 
+        # Simulator session, and the time spent on reward evaluations
+        self.dtype = dtype
+        self.floris = None
+        self.run_count = 0
+        self.run_time = 0.
+
+    # Standard deviation (and bound on the deviation from the mean) of the wind speed drawn by randomizeWind
+    wind_speed_diff = 0.005
+
+    @property
+    def nominal_wind_speed(self):
+        """
+        Mean wind speed of randomizeWind.
+        """
+        return self.wind_speed - self.wind_speed_diff
+
     def randomizeWind(self):
-        diff = 0.005
-        mid = self.wind_speed - diff
+        diff = self.wind_speed_diff
+        mid = self.nominal_wind_speed
         ub = mid + diff
         lb = mid - diff
         wind_speed = scipy.stats.norm.rvs(mid, diff, size=1)[0]
@@ -52,19 +77,64 @@ class FlorisWrapper:
 
         self.site["farm"]["properties"]["wind_speed"] = wind_speed
 
+    def reset(self):
+        # Rebuild the simulator from the site on the next run
+        self.floris = None
+
     def run(self, yaws):
+        start = time.perf_counter()
+
         # Set operational parameters
         for yaw, turbine in zip(yaws, self.site["turbines"]):
             turbine["properties"]["yaw_angle"] = yaw
         
-        # Build simulator
-        self.floris = floris.Floris(input_dict=self.site)
+        if self.floris is None:
+            # Build simulator
+            self.floris = floris.Floris(input_dict=self.site, dtype=self.dtype)
+        else:
+            # Update the existing simulator
+            self._update_wind_speed()
+            self.floris.farm.set_yaw_angles(list(yaws), calculate_wake=True)
         
         # Compute power productions
         power_productions = [turbine.power for turbine in self.floris.farm.turbines]
 
+        self.run_time += time.perf_counter() - start
+        self.run_count += 1
+
         return np.array(power_productions)
 
+    def run_batch(self, yaws_batch):
+        """
+        Power production of each turbine (columns) for every yaw configuration (rows) of the batch,
+        computed in a single wake calculation.
+        """
+        start = time.perf_counter()
+
+        if self.floris is None:
+            self.floris = floris.Floris(input_dict=self.site, dtype=self.dtype)
+        else:
+            self._update_wind_speed()
+        power_productions = self.floris.farm.flow_field.calculate_wake(np.asarray(yaws_batch))
+
+        self.run_time += time.perf_counter() - start
+        self.run_count += len(power_productions)
+
+        return power_productions
+
+    def _update_wind_speed(self):
+        farm = self.floris.farm
+        wind_speed = self.site["farm"]["properties"]["wind_speed"]
+        if wind_speed != farm.wind_speed:
+            farm.set_wind_speed(wind_speed, calculate_wake=False)
+
+    @property
+    def time_per_run(self):
+        """
+        Average wall-clock time (s) of a reward evaluation.
+        """
+        return self.run_time / self.run_count if self.run_count > 0 else float('nan')
+
     def plot_config(self, yaw_angles):
         X = self.site["farm"]["properties"]["layout_x"]
         Y = self.site["farm"]["properties"]["layout_y"]
@@ -136,23 +206,83 @@ elif (use == 3):
 
 simulator = FlorisWrapper(turbine_grid)
 
+# Yaw angles of the agents (arguments of main), and the number of yaw angles of every agent
+action_ranges = [yaw_range1, yaw_range2, yaw_range1, yaw_range2, yaw_range1, yaw_range3, yaw_range1]
+action_counts = tuple(len(yaw_range) for yaw_range in action_ranges)
+
+# Lookup mode: rewards are read from a table precomputed by build_reward_table (set the path in FLORIS_REWARD_TABLE)
+# instead of simulated, with optional Gaussian noise (standard deviation in W, set in FLORIS_REWARD_NOISE)
+reward_table = None
+reward_noise = float(os.environ.get("FLORIS_REWARD_NOISE", 0.))
+
+def load_reward_table(filename, noise=None):
+    # The noise keeps its current value (e.g., from FLORIS_REWARD_NOISE) unless given
+    global reward_table, reward_noise
+    table = np.load(filename, mmap_mode='r')
+    if table.shape != (np.prod(action_counts), len(action_counts)):
+        raise ValueError("Reward table %s does not match the yaw ranges" % filename)
+    reward_table = table
+    if noise is not None:
+        reward_noise = noise
+
+def to_yaws(actions):
+    """
+    Yaw angles of all turbines for the actions of the agents (last axis); the turbines without agent keep a yaw angle of 0.
+    """
+    actions = np.asarray(actions)
+    yaws = np.zeros(actions.shape[:-1] + (len(turbine_grid),))
+    for agent, yaw_range in enumerate(action_ranges):
+        yaws[..., agent] = yaw_range[actions[..., agent]]
+    return yaws
+
+def to_rewards(powers):
+    """
+    Reward of every agent from the powers of all turbines (last axis): the agents in front are rewarded for the turbine behind them.
+    """
+    pp = np.copy(powers[..., 0:7])
+    pp[..., 0] += powers[..., 7]
+    pp[..., 2] += powers[..., 8]
+    pp[..., 4] += powers[..., 9]
+    pp[..., 6] += powers[..., 10]
+    return pp
+
+def _evaluate_rewards(indices, wind_speed):
+    # Rewards of the joint actions with the given mixed-radix indices (runs in a worker process, with its own simulator)
+    simulator.site["farm"]["properties"]["wind_speed"] = wind_speed
+    actions = np.stack(np.unravel_index(indices, action_counts), axis=-1)
+    return to_rewards(simulator.run_batch(to_yaws(actions)))
+
+def build_reward_table(filename="reward_table.npy", batch_size=243, max_workers=None):
+    """
+    Evaluate the rewards of all joint actions at the nominal wind speed, in parallel, and save them as a table
+    whose rows are indexed by the mixed-radix index of the joint action (as np.ravel_multi_index with action_counts).
+    """
+    wind_speed = simulator.nominal_wind_speed
+    n_actions = int(np.prod(action_counts))
+    table = np.lib.format.open_memmap(filename, mode='w+', shape=(n_actions, len(action_counts)))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        starts = range(0, n_actions, batch_size)
+        batches = [np.arange(start, min(start + batch_size, n_actions)) for start in starts]
+        for start, rewards in zip(starts, executor.map(_evaluate_rewards, batches, itertools.repeat(wind_speed))):
+            table[start:start + len(rewards)] = rewards
+    table.flush()
+    return table
+
+if os.environ.get("FLORIS_REWARD_TABLE"):
+    load_reward_table(os.environ["FLORIS_REWARD_TABLE"])
+
 #def main(y1, y2, y3, y4, y5, y6, y7, y8):
 def main(y1, y2, y3, y4, y5, y6, y7):
 #def main(y1, y2, y3):
 
-    yaws = np.array([
-        yaw_range1[y1],
-        yaw_range2[y2],
-        yaw_range1[y3],
-        yaw_range2[y4],
-        yaw_range1[y5],
-        yaw_range3[y6],
-        yaw_range1[y7],
-        0,
-        0,
-        0,
-        0
-    ])
+    if reward_table is not None:
+        # Look up the rewards of the joint action
+        pp = np.array(reward_table[np.ravel_multi_index((y1, y2, y3, y4, y5, y6, y7), action_counts)])
+        if reward_noise > 0:
+            pp += scipy.stats.norm.rvs(0, reward_noise, size=len(pp))
+        return pp.tolist()
+
+    yaws = to_yaws([y1, y2, y3, y4, y5, y6, y7])
 
     #best_yaws          = np.array([27, -1, 27, -1, 27,  1, 27,  0,  0,  0,  0])
     #lowest_single_yaws = np.array([ 23, -10,  23, -10,  23,  -2,  23,   0,   0,   0,   0])
@@ -162,11 +292,7 @@ def main(y1, y2, y3, y4, y5, y6, y7):
     #max_v = sum(simulator.run(best_yaws))
     #min_single_v = min(simulator.run(lowest_single_yaws))
 
-    pp = np.copy(q[0:7])
-    pp[0] += q[7]
-    pp[2] += q[8]
-    pp[4] += q[9]
-    pp[6] += q[10]
+    pp = to_rewards(q)
     #print("######")
     #print([y1, y2, y3, y4, y5, y6])
     #print(yaws)
@@ -174,7 +300,7 @@ def main(y1, y2, y3, y4, y5, y6, y7):
     #print("######")
     return pp.tolist() #+ [max_v, min_single_v]
 
-def test():
+def test(batch_size=243):
     print("Running test...")
     best_power, best_yaws = float("-inf"), None
     min_power, min_single_power = float("+inf"), float("+inf")
@@ -184,30 +310,32 @@ def test():
     #lowest_single_yaws = np.array([ 23, -10,  23, -10,  23,  -2,  23,   0,   0,   0,   0])
     #print min(simulator.run(lowest_single_yaws))
     #return
-    for yyaws in itertools.product(yaw_range1, yaw_range2,
-                                   yaw_range1, yaw_range2,
-                                   yaw_range1, yaw_range3,
-                                   yaw_range1,
-                                   yaw_range4, yaw_range4, yaw_range4, yaw_range4):
-        yaws = np.array(list(yyaws))
-        powers = simulator.run(yaws)
-        pp = np.copy(powers[0:7])
-        pp[0] += powers[7]
-        pp[2] += powers[8]
-        pp[4] += powers[9]
-        pp[6] += powers[10]
-        power = sum(powers)
-        if power > best_power:
-            best_power, best_yaws = power, yaws
-        if power < min_power:
-            min_power = power
-        minpp = min(pp)
-        if minpp < min_single_power:
-            min_single_power, min_p_y = minpp, yaws
+    configurations = itertools.product(yaw_range1, yaw_range2,
+                                       yaw_range1, yaw_range2,
+                                       yaw_range1, yaw_range3,
+                                       yaw_range1,
+                                       yaw_range4, yaw_range4, yaw_range4, yaw_range4)
+    # Evaluate the configurations in batches (rows)
+    for batch in iter(lambda: list(itertools.islice(configurations, batch_size)), []):
+        yaws = np.array(batch)
+        powers = simulator.run_batch(yaws)
+        pp = to_rewards(powers)
+        power = powers.sum(axis=1)
+        if power.max() > best_power:
+            best_power, best_yaws = power.max(), yaws[power.argmax()]
+        if power.min() < min_power:
+            min_power = power.min()
+        minpp = pp.min(axis=1)
+        if minpp.min() < min_single_power:
+            min_single_power, min_p_y = minpp.min(), yaws[minpp.argmin()]
 
     print(time.time() - start)
     print(best_power, min_power, min_single_power, best_yaws, min_p_y)
     simulator.plot_config(best_yaws)
 
 if __name__ == "__main__":
-    test()
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "table":
+        build_reward_table(*sys.argv[2:3])
+    else:
+        test()
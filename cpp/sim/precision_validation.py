@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Validation of the reduced-precision mode of FLORIS (Floris(..., dtype=np.float32)) against float64.
+
+For the layout of generator.py (turbine_grid), all joint actions of its agents (action_ranges) are simulated in batches
+at both precisions, and the error on the turbine powers, on the total power and on the best joint action is reported,
+together with the time of the batched sweeps. The error of the flow field on the visualization grid is reported as well.
+"""
+
+import argparse
+import copy
+import time
+
+import numpy as np
+
+import floris
+import generator
+from floris.visualization import VisualizationManager
+
+
+def _site():
+    # FLORIS input of the layout of generator.py, at the nominal wind speed of its simulator
+    site = copy.deepcopy(generator.simulator.site)
+    site["farm"]["properties"]["wind_speed"] = generator.simulator.nominal_wind_speed
+    return site
+
+
+def _sweep(site, yaws, dtype, batch_size):
+    # Turbine powers of every yaw configuration (rows), and the time (s) of the batched wake calculations
+    flow_field = floris.Floris(input_dict=site, dtype=dtype).farm.flow_field
+    start = time.perf_counter()
+    powers = np.concatenate([flow_field.calculate_wake(yaws[i:i + batch_size]) for i in range(0, len(yaws), batch_size)])
+    return powers, time.perf_counter() - start
+
+
+def validate_powers(dtype=np.float32, batch_size=243):
+    """
+    Compare the powers of all joint actions at the given precision with float64.
+
+    Returns a dict with the maximum relative error of a turbine power and of the total power, whether the best joint
+    action is the same, and the times (s) of both sweeps.
+    """
+    site = _site()
+    actions = np.stack(np.unravel_index(np.arange(np.prod(generator.action_counts)), generator.action_counts), axis=-1)
+    yaws = generator.to_yaws(actions)
+
+    reference, reference_time = _sweep(site, yaws, np.float64, batch_size)
+    powers, time_ = _sweep(site, yaws, dtype, batch_size)
+    total, reference_total = powers.sum(axis=1), reference.sum(axis=1)
+    return {
+        "configurations": len(yaws),
+        "max_power_error": float(np.max(np.abs(powers - reference) / reference)),
+        "max_total_error": float(np.max(np.abs(total - reference_total) / reference_total)),
+        "same_best_action": bool(np.argmax(total) == np.argmax(reference_total)),
+        "time": time_,
+        "reference_time": reference_time,
+    }
+
+
+def validate_flow_field(dtype=np.float32, grid_resolution=(100, 100, 25)):
+    """
+    Compare the flow field on the visualization grid at the given precision with float64.
+
+    Returns the maximum absolute error of the velocity (m/s) and the sizes (bytes) of both flow fields.
+    """
+    site = _site()
+    fields = [VisualizationManager(floris.Floris(input_dict=site, dtype=precision).farm.flow_field, grid_resolution).u_field
+              for precision in (np.float64, dtype)]
+    return float(np.max(np.abs(fields[1] - fields[0]))), fields[0].nbytes, fields[1].nbytes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Error of reduced-precision FLORIS against float64")
+    parser.add_argument("--dtype", default="float32", help="numpy dtype to validate")
+    parser.add_argument("--skip-flow-field", action="store_true", help="skip the visualization grid")
+    args = parser.parse_args()
+    dtype = np.dtype(args.dtype)
+
+    result = validate_powers(dtype=dtype)
+    print("%d configurations: max power error %.2e, max total power error %.2e, same best action %s, "
+          "time %.3f s (float64 %.3f s)" % (result["configurations"], result["max_power_error"],
+                                            result["max_total_error"], result["same_best_action"],
+                                            result["time"], result["reference_time"]))
+    if not args.skip_flow_field:
+        error, reference_bytes, nbytes = validate_flow_field(dtype=dtype)
+        print("flow field: max velocity error %.2e m/s, %d bytes (float64 %d bytes)" % (error, nbytes, reference_bytes))
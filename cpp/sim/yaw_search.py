@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parallel exhaustive search over the discrete yaw configurations of the wind problem in generator.py.
+
+Computes the normalization constants of TurbinesProblem.hpp (maximum and minimum total power, minimum power per agent).
+The joint actions are split into shards of consecutive mixed-radix indices, which are evaluated by a pool of processes
+that each keep their own FLORIS session. Finished shards are checkpointed, such that an interrupted search can be resumed.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import time
+
+import numpy as np
+
+import generator
+
+
+class SearchStatistics:
+    """
+    Extremes of the power over the evaluated joint actions, with the joint action (agent action indices) attaining them.
+    """
+
+    def __init__(self, max_power=float("-inf"), max_actions=None, min_power=float("+inf"), min_actions=None,
+                 min_agent_power=float("+inf"), min_agent_actions=None):
+        self.max_power, self.max_actions = max_power, max_actions
+        self.min_power, self.min_actions = min_power, min_actions
+        self.min_agent_power, self.min_agent_actions = min_agent_power, min_agent_actions
+
+    @classmethod
+    def from_rewards(cls, actions, rewards):
+        """
+        Statistics of a batch of joint actions (rows) and the rewards of their agents (columns).
+        """
+        power = rewards.sum(axis=1)
+        min_agent = rewards.min(axis=1)
+        return cls(float(power.max()), actions[power.argmax()].tolist(),
+                   float(power.min()), actions[power.argmin()].tolist(),
+                   float(min_agent.min()), actions[min_agent.argmin()].tolist())
+
+    def merge(self, other):
+        if other.max_power > self.max_power:
+            self.max_power, self.max_actions = other.max_power, other.max_actions
+        if other.min_power < self.min_power:
+            self.min_power, self.min_actions = other.min_power, other.min_actions
+        if other.min_agent_power < self.min_agent_power:
+            self.min_agent_power, self.min_agent_actions = other.min_agent_power, other.min_agent_actions
+        return self
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    def __str__(self):
+        return ("maxPossiblePower = %r (actions %s)\nminPossiblePower = %r (actions %s)\nminPowerPerTurbine = %r (actions %s)"
+                % (self.max_power, self.max_actions, self.min_power, self.min_actions, self.min_agent_power, self.min_agent_actions))
+
+
+def _search_shard(start, stop, wind_speed, batch_size):
+    # Statistics of the joint actions with mixed-radix indices in [start, stop) (runs in a worker process, with its own simulator)
+    statistics = SearchStatistics()
+    for batch_start in range(start, stop, batch_size):
+        indices = np.arange(batch_start, min(batch_start + batch_size, stop))
+        actions = np.stack(np.unravel_index(indices, generator.action_counts), axis=-1)
+        rewards = generator._evaluate_rewards(indices, wind_speed)
+        statistics.merge(SearchStatistics.from_rewards(actions, rewards))
+    return statistics
+
+
+def search(shard_size=729, batch_size=243, max_workers=None, checkpoint=None, wind_speed=None):
+    """
+    Evaluate all joint actions and return their SearchStatistics.
+
+    inputs:
+        shard_size: int - number of joint actions per task of the process pool
+        batch_size: int - number of joint actions per batched wake calculation
+        max_workers: int - number of processes (all cores by default)
+        checkpoint: str - JSON file recording the finished shards and their statistics; an existing checkpoint is resumed
+        wind_speed: float - wind speed of the simulations (the mean wind speed of randomizeWind by default)
+    """
+    if wind_speed is None:
+        wind_speed = generator.simulator.nominal_wind_speed
+    n_actions = int(np.prod(generator.action_counts))
+    shards = [(start, min(start + shard_size, n_actions)) for start in range(0, n_actions, shard_size)]
+
+    # Resume from the checkpoint, if it belongs to the same search
+    statistics, done = SearchStatistics(), set()
+    settings = {"action_counts": list(generator.action_counts), "shard_size": shard_size, "wind_speed": wind_speed}
+    if checkpoint is not None and os.path.exists(checkpoint):
+        with open(checkpoint, "r") as f:
+            state = json.load(f)
+        if state["settings"] != settings:
+            raise ValueError("Checkpoint %s belongs to a search with different settings" % checkpoint)
+        statistics, done = SearchStatistics(**state["statistics"]), set(state["done"])
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_search_shard, start, stop, wind_speed, batch_size): shard
+                   for shard, (start, stop) in enumerate(shards) if shard not in done}
+        for future in concurrent.futures.as_completed(futures):
+            statistics.merge(future.result())
+            done.add(futures[future])
+            if checkpoint is not None:
+                _save_checkpoint(checkpoint, {"settings": settings, "statistics": statistics.to_dict(), "done": sorted(done)})
+
+    return statistics
+
+
+def _save_checkpoint(filename, state):
+    # Write to a temporary file first, such that an interruption never leaves a corrupt checkpoint
+    with open(filename + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(filename + ".tmp", filename)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exhaustive search over the yaw configurations of generator.py")
+    parser.add_argument("--checkpoint", help="JSON file to checkpoint to and resume from")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes")
+    parser.add_argument("--shard-size", type=int, default=729, help="joint actions per task")
+    args = parser.parse_args()
+
+    start = time.time()
+    print(search(shard_size=args.shard_size, max_workers=args.workers, checkpoint=args.checkpoint))
+    print(time.time() - start)
@@ -1,10 +1,13 @@
 # REQUIREMENTS Python 3.7
 # Numpy
 
+from elimination_order import elimination_order, peak_width
+
 import numpy as np
 import pandas as pd
+import time
 
-def variable_elimination(group_means):
+def variable_elimination(group_means, engine='numpy', order='min_fill'):
     """
     Variable elimination for multi-agent multi-armed bandits.
     
@@ -12,12 +15,129 @@ def variable_elimination(group_means):
     ----------
     group_means : list of pd.DataFrame
         For every group, a data frame where the first columns are the agents' names and the last column is the mean reward (named 'mu').
+    engine : {'numpy', 'pandas'}
+        'numpy' holds every factor as a dense array indexed by the agents' actions, 'pandas' merges and groups the data frames directly.
+    order : str or sequence of str
+        Either the name of an elimination heuristic (see 'elimination_order.HEURISTICS') or the agents' names in the order they are eliminated.
     Return
     ------
     pd.Series
         Joint arm with the agent's name annotated for each entry.
     """
-    
+    if isinstance(order, str):
+        order = _heuristic_order(group_means, order)
+
+    if engine == 'numpy':
+        return _variable_elimination_numpy(group_means, order)
+    elif engine == 'pandas':
+        return _variable_elimination_pandas(group_means, order)
+    else:
+        raise ValueError(f'Unknown variable elimination engine: {engine}')
+
+def compare_elimination_orders(group_means, orders=('appearance', 'min_degree', 'min_fill', 'weighted_min_fill'), engine='numpy', repeat=10):
+    """
+    Report the cost of variable elimination under different elimination orders.
+
+    Parameters
+    ----------
+    group_means : list of pd.DataFrame
+        See 'variable_elimination'.
+    orders : sequence of str
+        Names of the elimination heuristics to compare.
+    engine : {'numpy', 'pandas'}
+        See 'variable_elimination'.
+    repeat : int
+        Number of timed runs per order.
+    Return
+    ------
+    pd.DataFrame
+        For every heuristic (rows), the peak factor width and the mean elimination time in seconds.
+    """
+    scopes = [tuple(table.columns[:-1]) for table in group_means]
+    report = []
+    for heuristic in orders:
+        order = _heuristic_order(group_means, heuristic)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            variable_elimination(group_means, engine=engine, order=order)
+        elapsed = (time.perf_counter() - start) / repeat
+
+        report.append([heuristic, peak_width(scopes, order), elapsed])
+    return pd.DataFrame(report, columns=['heuristic', 'peak_width', 'time']).set_index('heuristic')
+
+def max_plus(group_means, n_iter=100, damping=0.5):
+    """
+    Max-plus (max-sum) message passing for multi-agent multi-armed bandits, an approximate alternative to variable elimination for large loopy graphs.
+
+    Parameters
+    ----------
+    group_means : list of pd.DataFrame
+        See 'variable_elimination'.
+    n_iter : int
+        Maximum number of message passing iterations.
+    damping : float
+        Weight in [0, 1) of the previous message when updating a message.
+    Return
+    ------
+    pd.Series
+        Best joint arm found, with the agent's name annotated for each entry.
+    """
+    plan = MaxPlusPlan([table.iloc[:, :-1] for table in group_means], n_iter, damping)
+    return plan.to_series(plan.execute([table.iloc[:, -1].values for table in group_means]))
+
+def compare_solvers(group_means, n_iter=100, damping=0.5, order='min_fill', repeat=10):
+    """
+    Report the solution quality and runtime of max-plus against exact variable elimination.
+
+    Parameters
+    ----------
+    group_means : list of pd.DataFrame
+        See 'variable_elimination'.
+    n_iter, damping : int, float
+        See 'max_plus'.
+    order : str or sequence of str
+        See 'variable_elimination'.
+    repeat : int
+        Number of timed runs per solver.
+    Return
+    ------
+    pd.DataFrame
+        For every solver (rows), the sum of the local means of its joint arm, the gap to the maximum and the mean time in seconds.
+    """
+    solvers = {
+        'variable_elimination': lambda: variable_elimination(group_means, order=order),
+        'max_plus': lambda: max_plus(group_means, n_iter, damping),
+    }
+    report = []
+    for name, solver in solvers.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            joint_arm = solver()
+        elapsed = (time.perf_counter() - start) / repeat
+
+        report.append([name, _joint_value(group_means, joint_arm), elapsed])
+    report = pd.DataFrame(report, columns=['solver', 'value', 'time']).set_index('solver')
+    report.insert(1, 'gap', report.loc['variable_elimination', 'value'] - report['value'])
+    return report
+
+def _joint_value(group_means, joint_arm):
+    # Sum of the local means of the joint arm
+    value = 0
+    for table in group_means:
+        scope = table.columns[:-1]
+        value += table.loc[(table[scope] == joint_arm[scope]).all(axis=1), table.columns[-1]].iloc[0]
+    return value
+
+def _heuristic_order(group_means, heuristic):
+    scopes = [tuple(table.columns[:-1]) for table in group_means]
+    domain_sizes = {}
+    for table, scope in zip(group_means, scopes):
+        for agent_name in scope:
+            domain_sizes[agent_name] = max(domain_sizes.get(agent_name, 0), table[agent_name].nunique())
+    return elimination_order(scopes, domain_sizes, heuristic)
+
+def _variable_elimination_pandas(group_means, order):
     # Create coordination graph from group_means
     agents = {}  # Mapping from name to object
     reward_functions = []
@@ -33,9 +153,8 @@ def variable_elimination(group_means):
         reward_function = RewardFunction(reward_name, table, group_agents)
         reward_functions.append(reward_function)
 
-    # Choose the agents to eliminate
-    #TODO how to pick agent
-    agents_ordered = list(agents.values())
+    # Eliminate the agents in the given order
+    agents_ordered = [agents[agent_name] for agent_name in order]
     for agent in agents_ordered:
         agent.resolve()  # Eliminate agent from the graph
 
@@ -46,6 +165,318 @@ def variable_elimination(group_means):
 
     return joint_arm.iloc[0]
 
+def _variable_elimination_numpy(group_means, order):
+    plan = EliminationPlan([table.iloc[:, :-1] for table in group_means], order)
+    return plan.to_series(plan.execute([table.iloc[:, -1].values for table in group_means]))
+
+def _broadcast(table, scope, joint_scope):
+    # Reorder the axes of the table (after the leading replica axis) to follow the joint scope, and add singleton axes for the missing agents (returns a view)
+    order = [0] + sorted(range(1, len(scope) + 1), key=lambda axis: joint_scope.index(scope[axis - 1]))
+    shape = [table.shape[0]] + [table.shape[scope.index(name) + 1] if name in scope else 1 for name in joint_scope]
+    return np.transpose(table, order).reshape(shape)
+
+class _CompiledGraph():
+    # Dense factor of every group and the encoding of the joint arms, shared by the compiled solvers
+
+    def __init__(self, groups, replicas=None):
+        # Collect the actions of every agent, so that each factor becomes a dense array indexed by action positions
+        self._actions = {}  # Mapping from agent name to its sorted action values
+        for arms in groups:
+            for agent_name in arms.columns:
+                values = np.unique(arms[agent_name].values)
+                self._actions[agent_name] = values if agent_name not in self._actions else np.union1d(self._actions[agent_name], values)
+        self.agent_names = list(self._actions)
+
+        self._batched = replicas is not None
+        n_replicas = replicas if self._batched else 1
+
+        # Dense factor per group, with the flat position of every local joint arm
+        self._factors = []  # List of (scope, table) pairs
+        self._group_factors = []
+        self._group_rows = []
+        for arms in groups:
+            scope = tuple(arms.columns)
+            shape = [len(self._actions[name]) for name in scope]
+            factor = np.full([n_replicas] + shape, -np.inf)
+            index = tuple(np.searchsorted(self._actions[name], arms[name].values) for name in scope)
+            positions = np.ravel_multi_index(index, shape)
+            self._group_factors.append((factor.reshape(n_replicas, -1), positions))
+            self._factors.append((scope, factor))
+
+            # Row of the local joint arm at every position, and the agents (columns of the joint arm) that define the position
+            rows = np.full(int(np.prod(shape)), -1, dtype=np.intp)
+            rows[positions] = np.arange(len(positions))
+            self._group_rows.append((rows, shape, [self.agent_names.index(name) for name in scope]))
+
+        self._replicas = np.arange(n_replicas)
+
+    def _load(self, group_values):
+        for (factor, positions), values in zip(self._group_factors, group_values):
+            factor[:, positions] = values
+
+    def group_arm_indices(self, joint_arms):
+        """
+        Parameters
+        ----------
+        joint_arms : np.ndarray
+            Joint arm over the agents in 'agent_names', or joint arms (rows) over the agents (columns).
+        Return
+        ------
+        np.ndarray
+            For every group (last axis), the row of the local joint arm within the group.
+        """
+        joint_arms = np.asarray(joint_arms)
+        return np.stack([rows[np.ravel_multi_index(tuple(np.moveaxis(joint_arms[..., agents], -1, 0)), shape)] for rows, shape, agents in self._group_rows], axis=-1)
+
+    def action_indices(self, joint_arm):
+        """
+        Parameters
+        ----------
+        joint_arm : pd.Series
+            Joint arm with the agent's name annotated for each entry.
+        Return
+        ------
+        np.ndarray
+            Joint arm over the agents in 'agent_names'.
+        """
+        return np.array([np.searchsorted(self._actions[name], joint_arm[name]) for name in self.agent_names])
+
+    def to_series(self, joint_arm):
+        """
+        Parameters
+        ----------
+        joint_arm : np.ndarray
+            Joint arm over the agents in 'agent_names'.
+        Return
+        ------
+        pd.Series
+            Joint arm with the agent's name annotated for each entry.
+        """
+        return pd.Series({name: self._actions[name][index] for name, index in zip(self.agent_names, joint_arm)})
+
+class EliminationPlan(_CompiledGraph):
+    """
+    Variable elimination compiled for a fixed coordination graph.
+
+    The graph structure, the elimination order and every intermediate factor are fixed when the plan is built,
+    so executing the plan only writes the new means into preallocated buffers and runs a fixed schedule of
+    broadcast-sums and max-reductions over them. Every buffer has a leading replica axis, such that the plan
+    can maximize the means of many independent bandit replicas at once.
+
+    Joint arms are integer arrays over the agents in 'agent_names', holding the index of every agent's action
+    among its sorted action values. The local joint arm of a group is identified by the mixed-radix index of
+    its agents' actions.
+
+    Methods
+    -------
+    execute(group_values)
+        Maximize the sum of the local means over the joint arms.
+    group_arm_indices(joint_arms)
+        Find the local joint arm of every group within the given joint arms.
+    action_indices(joint_arm)
+        Encode a joint arm labeled with the agents' names as an integer array.
+    to_series(joint_arm)
+        Decode an integer joint arm into the agents' action values.
+    """
+
+    def __init__(self, groups, order='min_fill', replicas=None):
+        """
+        Parameters
+        ----------
+        groups : list of pd.DataFrame
+            A data frame for each local group. The data frame consists of every possible local joint arm (rows) jointly over the agents (columns) within the group.
+        order : str or sequence of str
+            Either the name of an elimination heuristic (see 'elimination_order.HEURISTICS') or the agents' names in the order they are eliminated.
+        replicas : int or None
+            Number of replicas to maximize at once, or None for a single maximization.
+        """
+        super().__init__(groups, replicas)
+        n_replicas = len(self._replicas)
+
+        if isinstance(order, str):
+            scopes = [scope for scope, _ in self._factors]
+            order = elimination_order(scopes, {name: len(values) for name, values in self._actions.items()}, order)
+
+        # Schedule the elimination of every agent over preallocated buffers
+        factors = list(self._factors)
+        self._schedule = []
+        self._back_pointers = []
+        for agent_name in order:
+            involved = [factor for factor in factors if agent_name in factor[0]]
+            factors = [factor for factor in factors if agent_name not in factor[0]]
+            scope = tuple(dict.fromkeys(name for factor_scope, _ in involved for name in factor_scope))
+            axis = scope.index(agent_name) + 1
+            remaining = scope[:axis-1] + scope[axis:]
+
+            joint = np.empty([n_replicas] + [len(self._actions[name]) for name in scope])
+            terms = [_broadcast(table, factor_scope, scope) for factor_scope, table in involved]
+            best = np.empty(joint.shape[:axis] + joint.shape[axis+1:], dtype=np.intp)
+            reduced = np.empty(best.shape)
+
+            self._schedule.append((joint, terms, axis, best, reduced))
+            self._back_pointers.append((self.agent_names.index(agent_name), np.array([self.agent_names.index(name) for name in remaining], dtype=np.intp), best))
+            factors.append((remaining, reduced))
+
+        self._joint_index = np.zeros((n_replicas, len(self.agent_names)), dtype=np.intp)
+
+    def execute(self, group_values):
+        """
+        Parameters
+        ----------
+        group_values : list of np.ndarray
+            For every group, the mean of every local joint arm (in the same order as the rows of the group).
+            When maximizing replicas, every array has an additional leading replica axis.
+        Return
+        ------
+        np.ndarray
+            Joint arm over the agents in 'agent_names'.
+            When maximizing replicas, the joint arm of every replica (rows).
+        """
+        self._load(group_values)
+
+        # Sum the factors involving the agent by broadcasting them, and maximize over the agent
+        for joint, terms, axis, best, reduced in self._schedule:
+            np.copyto(joint, terms[0])
+            for term in terms[1:]:
+                np.add(joint, term, out=joint)
+            np.argmax(joint, axis=axis, out=best)
+            np.max(joint, axis=axis, out=reduced)
+
+        # Find maximum joint arm by following the back pointers in reverse elimination order
+        for agent, remaining, best in reversed(self._back_pointers):
+            self._joint_index[:, agent] = best[(self._replicas,) + tuple(self._joint_index[:, remaining].T)]
+
+        return self._joint_index.copy() if self._batched else self._joint_index[0].copy()
+
+class MaxPlusPlan(_CompiledGraph):
+    """
+    Max-plus (max-sum) message passing compiled for a fixed coordination graph.
+
+    Unlike variable elimination, the cost of an iteration is linear in the number of groups, so the plan also scales to
+    large loopy graphs (e.g., grids), at the price of not always finding the maximum. It is an anytime algorithm:
+    after every iteration the agents pick the actions that maximize their beliefs, and the best joint arm found so far is returned.
+    On graphs without loops (e.g., chains) the messages converge to the exact maximum.
+
+    Groups with the same table shape are stacked, such that every message of these groups is computed by a single array operation.
+    Every group should contain all of its local joint arms.
+
+    Methods
+    -------
+    execute(group_values)
+        Maximize the sum of the local means over the joint arms, within the iteration budget.
+    group_arm_indices(joint_arms)
+        Find the local joint arm of every group within the given joint arms.
+    action_indices(joint_arm)
+        Encode a joint arm labeled with the agents' names as an integer array.
+    to_series(joint_arm)
+        Decode an integer joint arm into the agents' action values.
+    """
+
+    def __init__(self, groups, n_iter=100, damping=0.5, tol=1e-9, replicas=None):
+        """
+        Parameters
+        ----------
+        groups : list of pd.DataFrame
+            A data frame for each local group. The data frame consists of every possible local joint arm (rows) jointly over the agents (columns) within the group.
+        n_iter : int
+            Maximum number of message passing iterations.
+        damping : float
+            Weight in [0, 1) of the previous message when updating a message, which helps convergence on loopy graphs.
+        tol : float
+            Message passing stops early once no message changes more than this.
+        replicas : int or None
+            Number of replicas to maximize at once, or None for a single maximization.
+        """
+        super().__init__(groups, replicas)
+        self.n_iter = n_iter
+        self.damping = damping
+        self.tol = tol
+        n_replicas = len(self._replicas)
+
+        # Stack the groups by table shape, with the agent (column of the joint arm) at every axis of the tables
+        buckets = {}
+        for g, (scope, factor) in enumerate(self._factors):
+            buckets.setdefault(factor.shape[1:], []).append(g)
+        self._buckets = []
+        for shape, members in buckets.items():
+            tables = np.empty((n_replicas, len(members)) + shape)
+            agents = np.array([[self.agent_names.index(name) for name in self._factors[g][0]] for g in members], dtype=np.intp)
+            self._buckets.append((members, tables, agents))
+
+        # Beliefs are padded to the largest number of actions, and padded actions are never picked
+        sizes = np.array([len(self._actions[name]) for name in self.agent_names])
+        self._padding = np.arange(sizes.max()) >= sizes[:, None]
+        self._beliefs = np.empty((n_replicas, len(self.agent_names), sizes.max()))
+
+    def execute(self, group_values):
+        """
+        Parameters
+        ----------
+        group_values : list of np.ndarray
+            For every group, the mean of every local joint arm (in the same order as the rows of the group).
+            When maximizing replicas, every array has an additional leading replica axis.
+        Return
+        ------
+        np.ndarray
+            Best joint arm found over the agents in 'agent_names'.
+            When maximizing replicas, the joint arm of every replica (rows).
+        """
+        self._load(group_values)
+        for members, tables, _ in self._buckets:
+            np.stack([self._factors[g][1] for g in members], axis=1, out=tables)
+
+        # Messages from the agents to the groups (q) and from the groups to the agents (r), per bucket and axis
+        q = [[np.zeros(tables.shape[:2] + (size,)) for size in tables.shape[2:]] for _, tables, _ in self._buckets]
+        r = [[np.zeros(tables.shape[:2] + (size,)) for size in tables.shape[2:]] for _, tables, _ in self._buckets]
+
+        best_value = np.full(len(self._replicas), -np.inf)
+        best_arm = np.zeros((len(self._replicas), len(self.agent_names)), dtype=np.intp)
+        for _ in range(self.n_iter):
+            # Group to agent: maximize the table plus the incoming messages over the other agents of the group
+            self._beliefs.fill(0)
+            change = 0
+            for (_, tables, agents), q_bucket, r_bucket in zip(self._buckets, q, r):
+                joint = tables.copy()
+                for axis, message in enumerate(q_bucket):
+                    joint += _expand(message, axis, len(q_bucket))
+                for axis, (message, old) in enumerate(zip(q_bucket, r_bucket)):
+                    others = tuple(2 + other for other in range(len(q_bucket)) if other != axis)
+                    new = self.damping*old + (1 - self.damping)*(joint.max(axis=others) - message)
+                    change = max(change, np.abs(new - old).max())
+                    old[...] = new
+                    np.add.at(self._beliefs, (slice(None), agents[:, axis], slice(0, new.shape[-1])), new)
+
+            # Agent to group: sum the messages from the other groups of the agent, normalized to zero mean
+            for (_, _, agents), q_bucket, r_bucket in zip(self._buckets, q, r):
+                for axis, (message, incoming) in enumerate(zip(q_bucket, r_bucket)):
+                    message[...] = self._beliefs[:, agents[:, axis], :message.shape[-1]] - incoming
+                    message -= message.mean(axis=-1, keepdims=True)
+
+            # Keep the joint arm of the maximal beliefs if it is the best so far
+            self._beliefs[:, self._padding] = -np.inf
+            joint_arm = self._beliefs.argmax(axis=-1)
+            value = self._value(joint_arm)
+            improved = value > best_value
+            best_value[improved] = value[improved]
+            best_arm[improved] = joint_arm[improved]
+
+            if change <= self.tol:
+                break
+
+        return best_arm if self._batched else best_arm[0]
+
+    def _value(self, joint_arms):
+        # Sum of the local means of every replica's joint arm
+        value = np.zeros(len(self._replicas))
+        for _, tables, agents in self._buckets:
+            index = (self._replicas[:, None], np.arange(tables.shape[1])) + tuple(joint_arms[:, agents[:, axis]] for axis in range(agents.shape[1]))
+            value += tables[index].sum(axis=-1)
+        return value
+
+def _expand(message, axis, n_axes):
+    # Add singleton axes, such that the message over a table axis broadcasts against the (replica, group, ...) tables
+    return message.reshape(message.shape[:2] + tuple(message.shape[-1] if other == axis else 1 for other in range(n_axes)))
+
 class RewardFunction():
     def __init__(self, name, table, agents):
         self.name = name
@@ -121,8 +552,8 @@ class Agent():
         # Create conditional policy
         self.cond_policy = new_reward.eliminate_agent(self)
     
-        # Update neighbors
-        for reward in self.rewards:
+        # Update neighbors (iterate over a copy, as replacing removes the reward from this agent's list)
+        for reward in list(self.rewards):
             reward.replace_in_agents(new_reward)
 
     def condition(self, partial_policy):
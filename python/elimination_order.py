@@ -0,0 +1,100 @@
+import itertools
+
+def elimination_order(scopes, domain_sizes, heuristic='min_fill'):
+    """
+    Greedy elimination order for variable elimination on a coordination graph.
+
+    The order only depends on the topology of the graph, so it is computed once per topology and cached.
+
+    Parameters
+    ----------
+    scopes : list of tuple of str
+        For every group, the names of the agents within the group.
+    domain_sizes : dict
+        Mapping from agent name to its number of actions.
+    heuristic : {'appearance', 'min_degree', 'min_fill', 'weighted_min_fill'}
+        Cost used to greedily pick the next agent to eliminate. Ties are broken by order of appearance in the scopes.
+    Return
+    ------
+    tuple of str
+        Agent names in the order in which they should be eliminated.
+    """
+    if heuristic not in HEURISTICS:
+        raise ValueError(f'Unknown elimination heuristic: {heuristic}')
+
+    scopes = tuple(tuple(scope) for scope in scopes)
+    key = (scopes, tuple(sorted(domain_sizes.items())), heuristic)
+    if key not in _order_cache:
+        _order_cache[key] = _greedy_order(scopes, domain_sizes, HEURISTICS[heuristic])
+    return _order_cache[key]
+
+def peak_width(scopes, order):
+    """
+    Parameters
+    ----------
+    scopes : list of tuple of str
+        For every group, the names of the agents within the group.
+    order : sequence of str
+        Elimination order of the agents.
+    Return
+    ------
+    int
+        Largest number of agents in a single factor created while eliminating the agents in the given order.
+    """
+    graph = _interaction_graph(scopes)
+    width = max(len(scope) for scope in scopes)
+    for agent in order:
+        width = max(width, len(graph[agent]) + 1)
+        _eliminate(graph, agent)
+    return width
+
+def _interaction_graph(scopes):
+    # Two agents are neighbors if they appear together in a group
+    graph = {}
+    for scope in scopes:
+        for agent in scope:
+            graph.setdefault(agent, set()).update(scope)
+            graph[agent].discard(agent)
+    return graph
+
+def _eliminate(graph, agent):
+    # Connect all neighbors of the agent and remove it from the graph
+    neighbors = graph.pop(agent)
+    for neighbor in neighbors:
+        graph[neighbor] |= neighbors - {neighbor}
+        graph[neighbor].discard(agent)
+
+def _greedy_order(scopes, domain_sizes, cost):
+    graph = _interaction_graph(scopes)
+    remaining = list(graph)  # Order of appearance
+    order = []
+    while remaining:
+        agent = min(remaining, key=lambda candidate: cost(graph, candidate, domain_sizes))
+        remaining.remove(agent)
+        order.append(agent)
+        _eliminate(graph, agent)
+    return tuple(order)
+
+def _missing_edges(graph, agent):
+    return [(u, v) for u, v in itertools.combinations(graph[agent], 2) if v not in graph[u]]
+
+def _appearance(graph, agent, domain_sizes):
+    return 0
+
+def _min_degree(graph, agent, domain_sizes):
+    return len(graph[agent])
+
+def _min_fill(graph, agent, domain_sizes):
+    return len(_missing_edges(graph, agent))
+
+def _weighted_min_fill(graph, agent, domain_sizes):
+    return sum(domain_sizes[u] * domain_sizes[v] for u, v in _missing_edges(graph, agent))
+
+HEURISTICS = {
+    'appearance': _appearance,
+    'min_degree': _min_degree,
+    'min_fill': _min_fill,
+    'weighted_min_fill': _weighted_min_fill,
+}
+
+_order_cache = {}  # Mapping from (scopes, domain sizes, heuristic) to elimination order
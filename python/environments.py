@@ -1,9 +1,9 @@
+import numpy as np
 import pandas as pd
-import scipy as sp
 
 class Bernoulli0101Chain():
     
-    def __init__(self, n_agents):
+    def __init__(self, n_agents, rng=None):
         self.agents = [f'A{i}' for i in range(n_agents)]
         
         self.groups = []
@@ -32,27 +32,68 @@ class Bernoulli0101Chain():
             means = pd.concat([group, means], axis=1, sort=False)
             self.true_means.append(means)
 
-    def regret(self, joint_arm):
-        # Compute optimal arm
-        optimal_arm = pd.Series([i % 2 for i in range(len(self.agents))], index=self.agents)
+        # Mean of every group, indexed by the mixed-radix index of the local joint arm (i.e., 2*a_i + a_{i+1})
+        self._means = np.array([local_means[f'mu{i}'].values for i, local_means in enumerate(self.true_means)])
+        self._groups_index = np.arange(n_agents-1)
+
+        # Optimal joint arm alternates between 0 and 1
+        optimal_arm = np.array([i % 2 for i in range(n_agents)])
+        self._optimal_value = self._get_means(optimal_arm).sum()
 
-        # Get true means
-        return sum(self._get_means(optimal_arm)) - sum(self._get_means(joint_arm))
+        # A single generator, or one per replica of a batch (a list of seeds or generators), such that the rewards of a
+        # replica do not depend on the other replicas
+        if isinstance(rng, (list, tuple)):
+            self._rng = [_generator(seed) for seed in rng]
+        else:
+            self._rng = _generator(rng)
+
+    def regret(self, joint_arm):
+        """
+        Parameters
+        ----------
+        joint_arm : pd.Series or np.ndarray
+            Joint arm with the agents' names annotated, or an array of actions ordered as 'agents'.
+            A two-dimensional array (or pd.DataFrame) holds a batch of joint arms (rows).
+        Return
+        ------
+        float or np.ndarray
+            Regret of the joint arm, or of every joint arm in the batch.
+        """
+        return self._optimal_value - self._get_means(joint_arm).sum(axis=-1)
 
     def execute(self, joint_arm):
-        local_rewards = []
-        for mean in self._get_means(joint_arm):
-            # Sample random reward
-            local_rewards.append(sp.stats.bernoulli(p=mean).rvs(1)[0])
-        return local_rewards
+        """
+        Parameters
+        ----------
+        joint_arm : pd.Series or np.ndarray
+            Joint arm with the agents' names annotated, or an array of actions ordered as 'agents'.
+            A two-dimensional array (or pd.DataFrame) holds a batch of joint arms (rows).
+        Return
+        ------
+        list of int or np.ndarray
+            For every group, a reward sampled for the local arm. For a batch, an array with the rewards of every joint arm (rows) and group (columns).
+            With a generator per replica, the batch holds one joint arm per replica.
+        """
+        means = self._get_means(joint_arm)
+        if isinstance(self._rng, list):
+            if means.shape[:-1] != (len(self._rng),):
+                raise ValueError(f"Expected a batch of {len(self._rng)} joint arms, one per replica")
+            # Sample the rewards of all groups at once, for every replica with its own generator
+            local_rewards = np.stack([rng.binomial(1, replica_means) for rng, replica_means in zip(self._rng, means)])
+        else:
+            # Sample the rewards of all groups at once
+            local_rewards = self._rng.binomial(1, means)
+        return local_rewards.tolist() if isinstance(joint_arm, pd.Series) else local_rewards
 
     def _get_means(self, joint_arm):
-        means = []
-        for local_means, group in zip(self.true_means, self.groups):
-            # Get local mean associated with joint arm
-            agents = group.columns
-            index = (local_means[agents] == joint_arm[agents]).all(axis=1)
-            mean = local_means.loc[index].drop(columns=agents).values[0,0]
-        
-            means.append(mean)
-        return means
+        if isinstance(joint_arm, (pd.Series, pd.DataFrame)):
+            joint_arm = joint_arm[self.agents].values
+        joint_arm = np.asarray(joint_arm, dtype=int)
+
+        # Get local mean associated with the local joint arm of every group
+        local_index = 2*joint_arm[..., :-1] + joint_arm[..., 1:]
+        return self._means[self._groups_index, local_index]
+
+
+def _generator(seed):
+    return seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
@@ -1,13 +1,17 @@
+from coordination_graph import compare_solvers, variable_elimination
 from environments import Bernoulli0101Chain
+from metrics import Statistics
 from posteriors import BetaPosterior
-from thompson_sampling import MultiAgentThompsonSampling
+from thompson_sampling import BatchMultiAgentThompsonSampling, MultiAgentThompsonSampling
 
+import itertools
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import scipy as sp
 
 
-def bernoulli_chain_experiment(n_iter):
+def bernoulli_chain_experiment(n_iter, verbose=True, filename=None):
     # Create environment
     n_agents = 10
     env = Bernoulli0101Chain(n_agents)
@@ -17,21 +21,102 @@ def bernoulli_chain_experiment(n_iter):
     
     # Run MATS
     mats = MultiAgentThompsonSampling(env.groups, priors)
-    regrets = []
+    columns = [mats.agents.index(agent) for agent in env.agents]  # Order the joint arm's entries as the environment's agents
+    regrets = Statistics(n_iter, filename)
     for i in range(n_iter):
         # Do step with MATS
         joint_arm = mats.pull()
-        local_rewards = env.execute(joint_arm)
+        local_rewards = env.execute(joint_arm[columns])
         mats.update(joint_arm, local_rewards)
 
         # Logging
-        regret = env.regret(joint_arm)
-        regrets.append(regret)
-        print(i, regret, '\t', joint_arm.values)
+        regret = env.regret(joint_arm[columns])
+        regrets.record(regret, i)
+        if verbose:
+            print(i, regret, '\t', mats.joint_arm_series(joint_arm).values)
+    regrets.close()
 
-    plt.plot(regrets)
+    plt.plot(regrets.process()[:, 0])
     plt.xlabel('Iteration')
     plt.ylabel('Regret')
     plt.savefig(f'test_bernoulli_chain_experiment_{n_iter}.pdf')
 
+def bernoulli_chain_batch_experiment(n_iter, n_replicas, seed=None, filename=None, binary=False, flush_every=None):
+    # Every replica r has its own MATS seed (seeds[r]) and environment seed sequence (env_seeds[r]), both derived from
+    # the same seed sequence, such that its regret curve neither depends on the number of replicas nor on the others
+    sequence = np.random.SeedSequence(seed)
+    seeds = sequence.generate_state(n_replicas)
+    env_seeds = sequence.spawn(n_replicas)
+
+    # Create environment
+    n_agents = 10
+    env = Bernoulli0101Chain(n_agents, rng=env_seeds)
+
+    # Create priors
+    priors = [[BetaPosterior(0.5, 0.5) for _ in range(arms.shape[0])] for arms in env.groups]
+
+    # Run MATS on all replicas at once, each with its own seed
+    mats = BatchMultiAgentThompsonSampling(env.groups, priors, seeds)
+    columns = [mats.agents.index(agent) for agent in env.agents]  # Order the joint arms' columns as the environment's agents
+    regrets = Statistics(n_iter, filename, binary, flush_every)
+    for i in range(n_iter):
+        # Do step with MATS
+        joint_arms = mats.pull()
+        local_rewards = env.execute(joint_arms[:, columns])
+        mats.update(joint_arms, local_rewards)
+
+        # Logging
+        regrets.record(env.regret(joint_arms[:, columns]), i)
+    regrets.close()
+
+    return regrets, seeds, env_seeds
+
+def max_plus_chain_benchmark(sizes=(10, 50, 100, 500), n_actions=3, n_iter=100, damping=0.5, seed=None):
+    # On chains max-plus should find the same maximum as variable elimination
+    rng = np.random.default_rng(seed)
+    reports = {}
+    for n_agents in sizes:
+        # Random means for every pair of neighboring agents
+        agents = [f'A{i}' for i in range(n_agents)]
+        actions = np.arange(n_actions)
+        group_means = []
+        for i in range(n_agents-1):
+            table = pd.DataFrame({agents[i]: np.repeat(actions, n_actions), agents[i+1]: np.tile(actions, n_actions)})
+            table[f'mu{i}'] = rng.random(len(table))
+            group_means.append(table)
+
+        reports[n_agents] = compare_solvers(group_means, n_iter, damping)
+
+    return pd.concat(reports, names=['n_agents'])
+
+def variable_elimination_engines_check(n_graphs=20, n_agents=6, edge_probability=0.3, orders=('appearance', 'min_fill'), seed=None):
+    # Both variable elimination engines should find the brute-force maximum on random connected graphs
+    rng = np.random.default_rng(seed)
+    for _ in range(n_graphs):
+        # A chain keeps the graph connected, random extra edges add cycles; every agent has 2 or 3 actions
+        agents = [f'A{i}' for i in range(n_agents)]
+        n_actions = rng.integers(2, 4, n_agents)
+        edges = [(i, i+1) for i in range(n_agents-1)]
+        edges += [(i, j) for i in range(n_agents) for j in range(i+2, n_agents) if rng.random() < edge_probability]
+        group_means = []
+        for k, (i, j) in enumerate(edges):
+            table = pd.DataFrame({agents[i]: np.repeat(np.arange(n_actions[i]), n_actions[j]),
+                                  agents[j]: np.tile(np.arange(n_actions[j]), n_actions[i])})
+            table[f'mu{k}'] = rng.random(len(table))
+            group_means.append(table)
+
+        # Brute force over all joint arms
+        joint_arms = pd.DataFrame(list(itertools.product(*(range(n) for n in n_actions))), columns=agents)
+        values = np.zeros(len(joint_arms))
+        for table in group_means:
+            values += joint_arms.merge(table, how='left', on=list(table.columns[:-1]))[table.columns[-1]].values
+        best = joint_arms.iloc[np.argmax(values)]
+
+        for engine in ('numpy', 'pandas'):
+            for order in orders:
+                joint_arm = variable_elimination(group_means, engine=engine, order=order)
+                if not (joint_arm[agents].values == best.values).all():
+                    raise AssertionError(f"{engine} engine ({order} order) misses the maximum of graph {edges}")
+    return n_graphs
+
 bernoulli_chain_experiment(n_iter=100)
@@ -0,0 +1,103 @@
+import numpy as np
+
+class Statistics():
+    """
+    Streaming statistics of a metric (e.g., regret) per timestep over independent runs, like 'AIToolbox::Statistics' of the C++ experiments.
+
+    For every timestep, the mean and variance over the runs of both the value and the cumulative value (sum up to the timestep)
+    are updated with Welford's algorithm in preallocated arrays, so memory does not grow with the number of runs.
+
+    The results are written as lines 't mean cumMean std cumStd' (the format read by 'cpp/plots'), or as raw float64 rows in binary mode.
+    """
+
+    def __init__(self, timesteps, filename=None, binary=False, flush_every=None):
+        """
+        Parameters
+        ----------
+        timesteps : int
+            Number of timesteps of every run.
+        filename : str or None
+            File to write the results to, or None to only keep them in memory.
+        binary : bool
+            Write rows of 5 float64 values (read back with 'np.fromfile(filename).reshape(-1, 5)') instead of text.
+        flush_every : int or None
+            Number of timesteps after which completed rows are appended to the file, or None to write all rows on 'close'.
+            Rows are only complete once every run has recorded them, so this requires all runs to be recorded at once (batches).
+        """
+        self._count = np.zeros(timesteps)
+        self._mean = np.zeros(timesteps)
+        self._m2 = np.zeros(timesteps)
+        self._cum_mean = np.zeros(timesteps)
+        self._cum_m2 = np.zeros(timesteps)
+
+        self._cumulative = np.zeros(1)  # Cumulative value of the run(s) being recorded
+        self._prev_timestep = 0
+
+        self._filename = filename
+        self._binary = binary
+        self._flush_every = flush_every
+        self._flushed = 0  # Number of rows written
+        if filename is not None:
+            open(filename, 'wb' if binary else 'w').close()
+
+    def __len__(self):
+        return len(self._count)
+
+    def record(self, value, t):
+        """
+        Parameters
+        ----------
+        value : float or np.ndarray
+            Value of a single run, or of a batch of runs, at timestep t.
+            Recording at a timestep that is not later than the previous one starts new runs (as in 'AIToolbox::Statistics').
+        t : int
+            Timestep.
+        """
+        value = np.atleast_1d(np.asarray(value, dtype=float))
+        if t <= self._prev_timestep or len(self._cumulative) != len(value):
+            self._cumulative = np.zeros(len(value))
+        self._prev_timestep = t
+        self._cumulative += value
+
+        _merge(self._mean, self._m2, t, self._count[t], value)
+        _merge(self._cum_mean, self._cum_m2, t, self._count[t], self._cumulative)
+        self._count[t] += len(value)
+
+        if self._flush_every is not None and t + 1 - self._flushed >= self._flush_every:
+            self.flush(t + 1)
+
+    def process(self):
+        """
+        Return
+        ------
+        np.ndarray
+            For every timestep (rows), the mean, cumulative mean, std and cumulative std (columns).
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.column_stack([self._mean, self._cum_mean, np.sqrt(self._m2 / self._count), np.sqrt(self._cum_m2 / self._count)])
+
+    def flush(self, end=None):
+        """
+        Append the rows that were not written yet, up to (but excluding) timestep end, to the file.
+        """
+        end = len(self) if end is None else end
+        if self._filename is None or end <= self._flushed:
+            return
+        rows = np.column_stack([np.arange(self._flushed, end), self.process()[self._flushed:end]])
+        with open(self._filename, 'ab' if self._binary else 'a') as file:
+            if self._binary:
+                rows.tofile(file)
+            else:
+                np.savetxt(file, rows, fmt=['%d'] + ['%.6g'] * 4)
+        self._flushed = end
+
+    def close(self):
+        self.flush()
+
+def _merge(mean, m2, t, count, values):
+    # Merge a batch of values into the running mean and M2 of count values at timestep t (Chan et al.'s update, Welford's for a single value)
+    n = len(values)
+    batch_mean = values.mean()
+    delta = batch_mean - mean[t]
+    mean[t] += delta * n / (count + n)
+    m2[t] += ((values - batch_mean)**2).sum() + delta**2 * count * n / (count + n)
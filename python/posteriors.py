@@ -1,6 +1,11 @@
+import numpy as np
 import scipy as sp
 import scipy.stats
 
+# Sample of a mean without any information yet (improper prior). Like the C++ ThompsonSamplingPolicy, it is large enough to dominate
+# every informed sample, but small enough that summing it over many groups stays finite, so joint arms with more unexplored local arms are preferred.
+UNINFORMED_SAMPLE = np.finfo(float).max / 2**20
+
 class Posterior():
 
     @property
@@ -29,38 +34,338 @@ class BetaPosterior(Posterior):
         return sp.stats.beta(a=self.a, b=self.b).rvs(1)[0]
 
 
-################
-
 class GaussianPosterior(Posterior):
+    """
+    Posterior of the mean of Gaussian rewards with known standard deviation.
+
+    Sufficient statistics are the number of rewards and their sum.
+    """
+
+    def __init__(self, std, type='jeffreys', prior_mean=0.0, prior_std=1.0):
+        self.std = std
+        self.count = 0
+        self.total = 0.0
+
+        # Check whether prior type exists
+        if type == 'jeffreys':
+            # Improper (flat) prior on the mean
+            self.mu0, self.tau0 = 0.0, 0.0
+        elif type == 'normal':
+            self.mu0, self.tau0 = prior_mean, prior_std**-2
+        else:
+            raise ValueError('This prior type does not exist')
+
+    @property
+    def mean(self):
+        return _gaussian_parameters(self.std, self.mu0, self.tau0, self.count, self.total)[0]
+
+    def update(self, x):
+        self.count += 1
+        self.total += x
+
+    def sample(self):
+        loc, scale = _gaussian_parameters(self.std, self.mu0, self.tau0, self.count, self.total)
+        if not np.isfinite(scale):
+            return UNINFORMED_SAMPLE
+        return sp.stats.norm(loc=loc, scale=scale).rvs(1)[0]
+
 
-    def __init__(self, std, type='jeffreys'):
-        self._std = std
-        self._type = type
-        self._count = 0
+class NormalGammaPosterior(Posterior):
+    """
+    Posterior of the mean of Gaussian rewards with unknown standard deviation.
+
+    Sufficient statistics are the number of rewards, their running mean and their sum of squared differences from the mean (M2).
+    The Jeffreys prior matches the Student-t sampling of the C++ ThompsonSamplingPolicy.
+    """
+
+    def __init__(self, type='jeffreys', prior_mean=0.0, prior_count=1.0, prior_shape=1.0, prior_rate=1.0):
+        self.count = 0
+        self.mu = 0.0
+        self.m2 = 0.0
 
         # Check whether prior type exists
         if type == 'jeffreys':
-            # Improper mean
-            self._mu = None
+            self.mu0, self.kappa0, self.alpha0, self.beta0 = 0.0, 0.0, -0.5, 0.0
+        elif type == 'normal_gamma':
+            self.mu0, self.kappa0, self.alpha0, self.beta0 = prior_mean, prior_count, prior_shape, prior_rate
         else:
             raise ValueError('This prior type does not exist')
-                
+
     @property
     def mean(self):
-        return self._mu
+        return _normal_gamma_parameters(self.mu0, self.kappa0, self.alpha0, self.beta0, self.count, self.mu, self.m2)[1]
+
+    def update(self, x):
+        # Welford's update of the running mean and M2
+        self.count += 1
+        delta = x - self.mu
+        self.mu += delta / self.count
+        self.m2 += delta * (x - self.mu)
+
+    def sample(self):
+        df, loc, scale = _normal_gamma_parameters(self.mu0, self.kappa0, self.alpha0, self.beta0, self.count, self.mu, self.m2)
+        if not np.isfinite(scale):
+            return UNINFORMED_SAMPLE
+        return sp.stats.t(df=df, loc=loc, scale=scale).rvs(1)[0]
+
+
+class GammaPosterior(Posterior):
+    """
+    Posterior of the mean of Poisson rewards.
+
+    The Jeffreys prior matches the C++ ThompsonSamplingPoissonPolicy.
+    """
+
+    def __init__(self, type='jeffreys', prior_shape=1.0, prior_rate=1.0):
+        # Check whether prior type exists
+        if type == 'jeffreys':
+            self.a, self.b = 0.5, 0.0
+        elif type == 'gamma':
+            self.a, self.b = prior_shape, prior_rate
+        else:
+            raise ValueError('This prior type does not exist')
 
     @property
-    def _sigma(self):
-        return self._std / self._count
+    def mean(self):
+        return self.a / self.b if self.b > 0 else np.nan
 
     def update(self, x):
-        self._mu = x if self._mu is None else (self._mu + x)
-        self._count += 1
+        self.a += x
+        self.b += 1
 
     def sample(self):
-        if self._count == 0:
-            #TODO: this should by decided within the TS sampler
-            return sp.stats.uniform(loc=0, scale=1).rvs(1)[0]
-            #TODO return None
+        if self.b == 0:
+            return UNINFORMED_SAMPLE
+        return sp.stats.gamma(a=self.a, scale=1/self.b).rvs(1)[0]
+
+
+def _gaussian_parameters(std, mu0, tau0, count, total):
+    # Location and scale of the posterior (infinite scale without information)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.float64(tau0) + count / std**2
+        return (tau0*mu0 + total / std**2) / precision, 1 / np.sqrt(precision)
+
+def _normal_gamma_parameters(mu0, kappa0, alpha0, beta0, count, mu, m2):
+    # Degrees of freedom, location and scale of the Student-t marginal posterior of the mean (infinite scale without information)
+    kappa = np.float64(kappa0) + count
+    alpha = np.float64(alpha0) + count / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        loc = (kappa0*mu0 + count*mu) / kappa
+        beta = beta0 + m2/2 + kappa0*count*(mu - mu0)**2 / (2*kappa)
+        informed = (kappa > 0) & (alpha > 0) & (beta >= 0)
+        scale = np.where(informed, np.sqrt(beta / (alpha*kappa)), np.inf)
+    return np.where(informed, 2*alpha, 1.0), loc, scale
+
+
+################
+
+class StackedPosteriors(Posterior):
+    """
+    Posteriors of many means, stored as contiguous arrays (one per name in '_fields') so that they can be sampled and updated at once.
+
+    Indexing with an integer gives the posterior of a single mean, slicing gives posteriors that share the arrays (and the random generator).
+
+    Two-dimensional arrays hold the posteriors of independent replicas (rows). Each replica then has its own random generator,
+    such that a replica behaves exactly like one-dimensional posteriors created with the same seed.
+    """
+
+    _fields = ()  # Names of the arrays, equal to the attributes of the posterior of a single mean
+
+    def __init__(self, rng=None, **arrays):
+        for name in self._fields:
+            setattr(self, name, np.asarray(arrays[name], dtype=float))
+        if self._first.ndim == 2:
+            self._rng = [_generator(seed) for seed in ([None] * len(self._first) if rng is None else rng)]
         else:
-            return sp.stats.norm(loc=self._mu, scale=self._sigma).rvs(1)[0]
+            self._rng = _generator(rng)
+
+    @classmethod
+    def from_posteriors(cls, posteriors, rng=None, replicas=None):
+        arrays = {name: [getattr(post, name) for post in posteriors] for name in cls._fields}
+        if replicas is not None:
+            arrays = {name: np.tile(values, (replicas, 1)) for name, values in arrays.items()}
+        return cls._from_arrays([arrays[name] for name in cls._fields], rng)
+
+    @classmethod
+    def _from_arrays(cls, arrays, rng):
+        # Constructor arguments are the arrays in the order of '_fields'
+        return cls(*arrays, rng=rng)
+
+    @property
+    def _first(self):
+        return getattr(self, self._fields[0])
+
+    def __len__(self):
+        return len(self._first)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._from_arrays([getattr(self, name)[index] for name in self._fields], self._rng)
+        return _PosteriorView(self, index)
+
+    def update(self, x, index=slice(None)):
+        """
+        Parameters
+        ----------
+        x : float or np.ndarray
+            reward (or rewards) received for the means at index
+        index : int, slice, np.ndarray or tuple of np.ndarray
+            means to update (every mean should appear at most once)
+        """
+        raise NotImplementedError()
+
+    def sample(self, index=slice(None)):
+        if self._first.ndim == 2:
+            return np.stack([self._sample(rng, (replica, index)) for replica, rng in enumerate(self._rng)])
+        return self._sample(self._rng, index)
+
+    def _sample(self, rng, index):
+        raise NotImplementedError()
+
+
+class BetaPosteriors(StackedPosteriors):
+    # Array counterpart of 'BetaPosterior'
+
+    _fields = ('a', 'b')
+
+    def __init__(self, alpha, beta, rng=None):
+        super().__init__(rng, a=alpha, b=beta)
+
+    @property
+    def mean(self):
+        return self.a / (self.a + self.b)
+
+    def update(self, x, index=slice(None)):
+        np.add.at(self.a, index, x)
+        np.add.at(self.b, index, 1 - np.asarray(x))
+
+    def _sample(self, rng, index):
+        return rng.beta(self.a[index], self.b[index])
+
+
+class GaussianPosteriors(StackedPosteriors):
+    # Array counterpart of 'GaussianPosterior'
+
+    _fields = ('std', 'mu0', 'tau0', 'count', 'total')
+
+    def __init__(self, std, mu0, tau0, count, total, rng=None):
+        super().__init__(rng, std=std, mu0=mu0, tau0=tau0, count=count, total=total)
+
+    @property
+    def mean(self):
+        return _gaussian_parameters(self.std, self.mu0, self.tau0, self.count, self.total)[0]
+
+    def update(self, x, index=slice(None)):
+        self.count[index] += 1
+        self.total[index] += x
+
+    def _sample(self, rng, index):
+        loc, scale = _gaussian_parameters(self.std[index], self.mu0[index], self.tau0[index], self.count[index], self.total[index])
+        informed = np.isfinite(scale)
+        return np.where(informed, rng.normal(np.where(informed, loc, 0), np.where(informed, scale, 1)), UNINFORMED_SAMPLE)
+
+
+class NormalGammaPosteriors(StackedPosteriors):
+    # Array counterpart of 'NormalGammaPosterior'
+
+    _fields = ('mu0', 'kappa0', 'alpha0', 'beta0', 'count', 'mu', 'm2')
+
+    def __init__(self, mu0, kappa0, alpha0, beta0, count, mu, m2, rng=None):
+        super().__init__(rng, mu0=mu0, kappa0=kappa0, alpha0=alpha0, beta0=beta0, count=count, mu=mu, m2=m2)
+
+    @property
+    def mean(self):
+        return _normal_gamma_parameters(self.mu0, self.kappa0, self.alpha0, self.beta0, self.count, self.mu, self.m2)[1]
+
+    def update(self, x, index=slice(None)):
+        # Welford's update of the running means and M2s
+        self.count[index] += 1
+        delta = x - self.mu[index]
+        self.mu[index] += delta / self.count[index]
+        self.m2[index] += delta * (x - self.mu[index])
+
+    def _sample(self, rng, index):
+        df, loc, scale = _normal_gamma_parameters(self.mu0[index], self.kappa0[index], self.alpha0[index], self.beta0[index],
+                                                  self.count[index], self.mu[index], self.m2[index])
+        informed = np.isfinite(scale)
+        return np.where(informed, loc + rng.standard_t(df) * np.where(informed, scale, 0), UNINFORMED_SAMPLE)
+
+
+class GammaPosteriors(StackedPosteriors):
+    # Array counterpart of 'GammaPosterior'
+
+    _fields = ('a', 'b')
+
+    def __init__(self, a, b, rng=None):
+        super().__init__(rng, a=a, b=b)
+
+    @property
+    def mean(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.b > 0, self.a / self.b, np.nan)
+
+    def update(self, x, index=slice(None)):
+        self.a[index] += x
+        self.b[index] += 1
+
+    def _sample(self, rng, index):
+        informed = self.b[index] > 0
+        return np.where(informed, rng.gamma(self.a[index], 1 / np.where(informed, self.b[index], 1)), UNINFORMED_SAMPLE)
+
+
+class _PosteriorView(Posterior):
+    # Posterior of a single mean within an array of posteriors
+
+    def __init__(self, posteriors, index):
+        self._posteriors = posteriors
+        self._index = index
+
+    @property
+    def mean(self):
+        return self._posteriors.mean[self._index]
+
+    def update(self, x):
+        self._posteriors.update(x, self._index)
+
+    def sample(self):
+        return self._posteriors.sample(self._index)
+
+    def __getattr__(self, name):
+        # The statistics of the mean (e.g., 'a' and 'b' of a Beta posterior), read from the arrays
+        if name.startswith('_') or name not in self._posteriors._fields:
+            raise AttributeError(name)
+        return getattr(self._posteriors, name)[self._index]
+
+
+def stack_posteriors(posteriors, rng=None, replicas=None):
+    """
+    Parameters
+    ----------
+    posteriors : list of objects with superclass 'Posterior'
+        Posteriors of individual means.
+    rng : None, int or np.random.Generator
+        Seed or generator used to sample from the stacked posteriors (a sequence of them, one per replica, when stacking replicas).
+    replicas : int or None
+        Number of independent copies of the posteriors to stack as rows, or None for a single copy.
+    Return
+    ------
+    object with superclass 'StackedPosteriors' or None
+        The posteriors stored as arrays, or None if there is no array counterpart for their type.
+    """
+    types = set(type(post) for post in posteriors)
+    if len(types) != 1 or types.pop() not in _STACKED:
+        return None
+    return _STACKED[type(posteriors[0])].from_posteriors(posteriors, rng, replicas)
+
+
+def _generator(seed):
+    return seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+
+# Array counterpart of every posterior type
+_STACKED = {
+    BetaPosterior: BetaPosteriors,
+    GaussianPosterior: GaussianPosteriors,
+    NormalGammaPosterior: NormalGammaPosteriors,
+    GammaPosterior: GammaPosteriors,
+}
@@ -1,4 +1,5 @@
-from coordination_graph import variable_elimination
+from coordination_graph import EliminationPlan, MaxPlusPlan, variable_elimination
+from posteriors import Posterior, stack_posteriors
 
 import numpy as np
 import pandas as pd
@@ -12,10 +13,14 @@ class ThompsonSampling():
     -------
     sample()
         Sample a single value for each the mean posteriors.
+    sample_values()
+        Sample a single value for each the mean posteriors, without labeling them with the arms.
     pull()
         Pull an arm according to the probability matching mechanism of Thompson sampling.
     update(arm, reward)
         Update an arm's mean posterior with a given reward.
+    posteriors
+        The current mean posterior of every arm.
     """
     
     def __init__(self, arms, priors):
@@ -25,11 +30,23 @@ class ThompsonSampling():
         arms : pd.DataFrame
             arms with entries labeled with the associated agent
         priors : list of objects with superclass 'posteriors.Posterior'
-            prior for each arm (should be in the same order as arms)
+            prior for each arm (should be in the same order as arms), or a single object holding the priors of all arms (e.g., 'posteriors.BetaPosteriors').
+            A list of priors is copied into arrays if possible (see 'posteriors.stack_posteriors'), in which case its objects are not updated: see 'posteriors' instead.
         """
         self._arms = arms
+        if not isinstance(priors, Posterior):
+            # Store the priors as arrays if possible, to sample all arms at once
+            priors = stack_posteriors(priors) or priors
         self._posteriors = priors  # Mean posteriors
 
+    @property
+    def posteriors(self):
+        """
+        list of objects with superclass 'posteriors.Posterior'
+            The current mean posterior of every arm (views of the arrays if the priors were stacked).
+        """
+        return [self._posteriors[arm] for arm in range(len(self._posteriors))]
+
     def sample(self):
         """
         Returns
@@ -38,37 +55,42 @@ class ThompsonSampling():
             A sample from every mean's posterior.
         """
         theta = self._arms.copy()
-        theta['mu'] = [post.sample() for post in self._posteriors]
+        theta['mu'] = self.sample_values()
         return theta
+
+    def sample_values(self):
+        """
+        Returns
+        -------
+        np.ndarray
+            A sample from every mean's posterior (in the same order as the arms).
+        """
+        if isinstance(self._posteriors, Posterior):
+            return self._posteriors.sample()
+        return np.array([post.sample() for post in self._posteriors])
     
     def pull(self):
         """
         Returns
         -------
-        pd.Series
-            A joint arm with the agents' names as columns
+        int
+            Index of the pulled arm (row in arms)
         """
-        # Sample
-        means = self.sample()
-        
-        # Maximize
-        max_operator = lambda x: x.loc[x[self.name] == x[self.name].max()]
-        a_max = means.loc[means['mu'] == means['mu'].max()]
-        a_max.drop(columns='mu', inplace=True)
-
-        return a_max
+        # Sample and maximize
+        return int(np.argmax(self.sample_values()))
 
     def update(self, arm, reward):
         """
         Parameters
         ----------
-        arm : pd.Series
-            arm with entries labeled with the associated agent
+        arm : int or pd.Series
+            index of the arm (row in arms), or the arm with entries labeled with the associated agent
         reward : float
             reward received for executing the arm
         """
-        index = np.where((self._arms == arm).all(axis=1))[0][0]
-        self._posteriors[index].update(reward)
+        if isinstance(arm, pd.Series):
+            arm = np.where((self._arms == arm).all(axis=1))[0][0]
+        self._posteriors[arm].update(reward)
 
 class MultiAgentThompsonSampling():
     """
@@ -82,9 +104,15 @@ class MultiAgentThompsonSampling():
         Pull a joint arm according to the probability matching mechanism of MATS.
     update(arm, reward)
         Update an arm's mean posterior with a given reward.
+    joint_arm_series(joint_arm)
+        Label a joint arm with the agents' names (e.g., for logging).
+    posteriors
+        The current mean posteriors of every group.
+
+    Joint arms are integer arrays over the agents (see 'agents'), holding the index of every agent's action among its sorted action values.
     """
 
-    def __init__(self, groups, priors):
+    def __init__(self, groups, priors, engine='numpy', order='min_fill', rng=None, n_iter=100, damping=0.5, tol=1e-9):
         """
         Parameters
         ----------
@@ -92,11 +120,54 @@ class MultiAgentThompsonSampling():
             A data frame for each local group. The data frame consists of every possible local joint arm (rows) jointly over the agents (columns) within the group.
         priors : list of list of objects with superclass 'posteriors.Posterior'
             Each group has a list of priors, i.e., one for the mean of every local joint action.
+            The priors are copied into arrays if possible (see 'posteriors.stack_posteriors'), in which case these objects are not updated: see 'posteriors' instead.
+        engine : {'numpy', 'pandas', 'max_plus'}
+            Variable elimination engine used to maximize the sampled means (see 'coordination_graph.variable_elimination'),
+            or 'max_plus' to approximately maximize them by message passing on graphs too large for variable elimination (see 'coordination_graph.MaxPlusPlan').
+        order : str or sequence of str
+            Elimination heuristic or explicit elimination order (see 'coordination_graph.variable_elimination').
+        rng : None, int or np.random.Generator
+            Seed or generator for sampling the posteriors. Requires priors that can be stored as arrays (see 'posteriors.stack_posteriors').
+        n_iter, damping, tol : int, float, float
+            Iteration budget, damping and convergence tolerance of max-plus (see 'coordination_graph.MaxPlusPlan'), if engine is 'max_plus'.
         """
+        # Store the priors of all groups as a single array if possible, so that every pull samples all means at once
+        self._posteriors = stack_posteriors([prior for local_priors in priors for prior in local_priors], rng)
+        if self._posteriors is None and rng is not None:
+            raise ValueError("A seed requires priors that can be stored as arrays (see 'posteriors.stack_posteriors')")
+        ends = np.cumsum([len(local_priors) for local_priors in priors])
+        self._offsets = np.concatenate(([0], ends[:-1]))
+        if self._posteriors is not None:
+            priors = [self._posteriors[start:end] for start, end in zip(self._offsets, ends)]
+
         # Create local Thompson sampler per group
         self._groups = groups
+        self._engine = engine
+        self._order = order
         self._groups_samplers = [ThompsonSampling(local_arms, local_priors) for local_arms, local_priors in zip(groups, priors)]
 
+        # The coordination graph is fixed, so the maximization (and the encoding of the joint arms) is compiled once
+        if engine == 'max_plus':
+            self._plan = MaxPlusPlan(groups, n_iter, damping, tol)
+        else:
+            self._plan = EliminationPlan(groups, order)
+
+    @property
+    def agents(self):
+        """
+        list of str
+            The agents' names, in the order of the entries of the joint arms.
+        """
+        return self._plan.agent_names
+
+    @property
+    def posteriors(self):
+        """
+        list of list of objects with superclass 'posteriors.Posterior'
+            For every group, the current posterior of the mean of every local joint action (see 'ThompsonSampling.posteriors').
+        """
+        return [sampler.posteriors for sampler in self._groups_samplers]
+
     def sample(self):
         """
         Returns
@@ -117,28 +188,134 @@ class MultiAgentThompsonSampling():
         """
         Returns
         -------
-        pd.Series
-            A joint arm with the agents' names as columns
+        np.ndarray
+            A joint arm over the agents (see 'agents')
         """
+        if self._engine in ('numpy', 'max_plus'):
+            # Sample and maximize with the compiled plan
+            if self._posteriors is not None:
+                group_values = np.split(self._posteriors.sample(), self._offsets[1:])
+            else:
+                group_values = [sampler.sample_values() for sampler in self._groups_samplers]
+            return self._plan.execute(group_values)
+
         # Sample
         group_means = self.sample()
         
         # Maximize
-        a_max = variable_elimination(group_means)
+        a_max = variable_elimination(group_means, engine=self._engine, order=self._order)
 
-        return a_max
+        return self._plan.action_indices(a_max)
 
     def update(self, joint_arm, local_rewards):
         """
         Parameters
         ----------
-        joint_arm : pd.Series
-            arm with entries labeled with the associated agent
+        joint_arm : np.ndarray or pd.Series
+            arm over the agents (see 'agents'), or arm with entries labeled with the associated agent
         local_rewards : list of float
             For each group, the reward received for executing the local arm
         ----------
         """
-        for local_arms, local_sampler, local_reward in zip(self._groups, self._groups_samplers, local_rewards):
-            local_sampler.update(joint_arm[local_arms.columns], local_reward)
+        if isinstance(joint_arm, pd.Series):
+            joint_arm = self._plan.action_indices(joint_arm)
+
+        # Find the local arm of every group by its mixed-radix index
+        local_arms = self._plan.group_arm_indices(joint_arm)
+        if self._posteriors is not None:
+            self._posteriors.update(local_rewards, self._offsets + local_arms)
+        else:
+            for local_arm, local_sampler, local_reward in zip(local_arms, self._groups_samplers, local_rewards):
+                local_sampler.update(local_arm, local_reward)
+
+    def joint_arm_series(self, joint_arm):
+        """
+        Parameters
+        ----------
+        joint_arm : np.ndarray
+            arm over the agents (see 'agents')
+        Returns
+        -------
+        pd.Series
+            A joint arm with the agents' action values, labeled with the agents' names
+        """
+        return self._plan.to_series(joint_arm)
             
 
+
+class BatchMultiAgentThompsonSampling():
+    """
+    Multi-agent Thompson sampling (MATS) mechanism for many independent bandit replicas at once.
+
+    Every replica runs its own MATS, but the replicas share a leading axis through posterior sampling, variable elimination and the posterior updates,
+    such that a single pull or update advances all replicas by one step. Replica r behaves exactly like 'MultiAgentThompsonSampling' with rng=seeds[r].
+
+    Methods
+    -------
+    pull()
+        Pull a joint arm for every replica according to the probability matching mechanism of MATS.
+    update(joint_arms, local_rewards)
+        Update the mean posteriors of every replica with the given rewards.
+    """
+
+    def __init__(self, groups, priors, seeds, engine='numpy', order='min_fill', n_iter=100, damping=0.5, tol=1e-9):
+        """
+        Parameters
+        ----------
+        groups : list of pd.DataFrame
+            A data frame for each local group. The data frame consists of every possible local joint arm (rows) jointly over the agents (columns) within the group.
+        priors : list of list of objects with superclass 'posteriors.Posterior'
+            Each group has a list of priors, i.e., one for the mean of every local joint action. The priors are copied to every replica.
+        seeds : sequence of int or np.random.Generator
+            Seed or generator for sampling the posteriors of every replica.
+        engine : {'numpy', 'max_plus'}
+            Maximize the sampled means by variable elimination, or approximately by message passing (see 'coordination_graph.MaxPlusPlan').
+        order : str or sequence of str
+            Elimination heuristic or explicit elimination order (see 'coordination_graph.variable_elimination').
+        n_iter, damping, tol : int, float, float
+            Iteration budget, damping and convergence tolerance of max-plus (see 'coordination_graph.MaxPlusPlan'), if engine is 'max_plus'.
+        """
+        self.seeds = seeds
+        n_replicas = len(seeds)
+
+        self._posteriors = stack_posteriors([prior for local_priors in priors for prior in local_priors], seeds, n_replicas)
+        if self._posteriors is None:
+            raise ValueError("Batched MATS requires priors that can be stored as arrays (see 'posteriors.stack_posteriors')")
+        ends = np.cumsum([len(local_priors) for local_priors in priors])
+        self._offsets = np.concatenate(([0], ends[:-1]))
+        self._replicas = np.repeat(np.arange(n_replicas), len(groups))
+
+        if engine == 'max_plus':
+            self._plan = MaxPlusPlan(groups, n_iter, damping, tol, replicas=n_replicas)
+        else:
+            self._plan = EliminationPlan(groups, order, replicas=n_replicas)
+
+    @property
+    def agents(self):
+        """
+        list of str
+            The agents' names, in the order of the columns of the joint arms.
+        """
+        return self._plan.agent_names
+
+    def pull(self):
+        """
+        Returns
+        -------
+        np.ndarray
+            A joint arm for every replica (rows) over the agents (columns, see 'agents').
+        """
+        group_values = np.split(self._posteriors.sample(), self._offsets[1:], axis=1)
+        return self._plan.execute(group_values)
+
+    def update(self, joint_arms, local_rewards):
+        """
+        Parameters
+        ----------
+        joint_arms : np.ndarray
+            A joint arm for every replica (rows) over the agents (columns, see 'agents').
+        local_rewards : array_like
+            For every replica (rows) and group (columns), the reward received for executing the local arm
+        """
+        arms = self._plan.group_arm_indices(joint_arms) + self._offsets
+        self._posteriors.update(np.ravel(local_rewards), (self._replicas, arms.ravel()))